@@ -1,8 +1,17 @@
 # Run the MCP server when executing: python -m mcp_server
-from mcp_server.server import mcp
 import os
 
 if __name__ == "__main__":
+    # Imported here so the MCP SDK (and its transitive deps) only load when actually serving
+    from mcp_server.server import mcp, start_keep_warm, warmup
+
     host = os.getenv("MCP_HOST", "0.0.0.0")
     port = int(os.getenv("MCP_PORT", "8000"))
+    # MCP_WARMUP=1: load deps, register tools and self-ping before accepting traffic
+    if os.getenv("MCP_WARMUP", "").lower() in ("true", "1", "yes"):
+        warmup()
+    # MCP_KEEP_WARM=<seconds>: periodically ping our own endpoint so idle instances are not torn down
+    keep_warm_seconds = float(os.getenv("MCP_KEEP_WARM", "0") or 0)
+    if keep_warm_seconds > 0:
+        start_keep_warm(port, keep_warm_seconds)
     mcp.run(transport="streamable-http", host=host, port=port)
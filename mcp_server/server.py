@@ -9,34 +9,102 @@ so the main app's MCP client can load these tools.
 
 Requires: pip install mcp
 """
+import asyncio
+import logging
 import os
+import threading
+import time
+from typing import Any, Callable
 
-from mcp.server.fastmcp import FastMCP
+logger = logging.getLogger(__name__)
 
-# Create the MCP server. Name appears in MCP clients.
-mcp = FastMCP(
-    "Agentic Production MCP",
-    json_response=True,
-)
+# Tools registered with @tool; attached to the FastMCP instance when it is first built.
+_TOOLS: list[Callable[..., Any]] = []
+
+_mcp = None
+
+
+def tool(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Register fn as an MCP tool. The docstring is the description the LLM sees."""
+    _TOOLS.append(fn)
+    return fn
+
+
+def _get_mcp():
+    """Return the FastMCP server, importing the MCP SDK on first use (it pulls in heavy deps)."""
+    global _mcp
+    if _mcp is None:
+        from mcp.server.fastmcp import FastMCP
+
+        # Name appears in MCP clients.
+        _mcp = FastMCP(
+            "Agentic Production MCP",
+            json_response=True,
+        )
+        for fn in _TOOLS:
+            _mcp.tool()(fn)
+    return _mcp
+
+
+def warmup() -> None:
+    """Pay one-time import/registration cost before serving: load HTTP deps, build the server, list tools, call ping."""
+    import httpx  # noqa: F401  (transport dep of streamable-http; imported here so the first request doesn't)
+
+    server = _get_mcp()
+    server._tool_manager.list_tools()
+    ping()
+
+
+def start_keep_warm(port: int, interval_seconds: float) -> threading.Thread:
+    """Ping this server's own `ping` tool every interval_seconds (daemon thread) so it is not torn down as idle."""
+    url = f"http://localhost:{port}/mcp"
+
+    async def _ping_once() -> None:
+        from mcp import ClientSession
+        from mcp.client.streamable_http import streamablehttp_client
+
+        async with streamablehttp_client(url) as (read, write, _):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                await session.call_tool("ping", {})
+
+    def _loop() -> None:
+        while True:
+            time.sleep(interval_seconds)
+            try:
+                asyncio.run(_ping_once())
+            except Exception as e:
+                logger.warning("MCP keep-warm ping to %s failed: %s", url, e)
+
+    t = threading.Thread(target=_loop, name="mcp-keep-warm", daemon=True)
+    t.start()
+    return t
+
+
+def __getattr__(name: str) -> Any:
+    # `from mcp_server.server import mcp` still works; the server is built lazily.
+    if name == "mcp":
+        return _get_mcp()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # --- Register your tools below. The main app discovers them via MCP_SERVER_URL. ---
 
 
-@mcp.tool()
+@tool
 def ping() -> str:
     """Health check: returns 'pong'. Use to verify the MCP server is reachable."""
     return "pong"
 
 
-@mcp.tool()
+@tool
 def echo(message: str) -> str:
     """Echo back the given message. Example MCP tool."""
     return message
 
 
 # Add more tools here, e.g.:
-# @mcp.tool()
+# @tool
 # def your_tool(arg: str) -> str:
 #     """Description for the LLM."""
 #     return "result"
@@ -45,4 +113,4 @@ def echo(message: str) -> str:
 if __name__ == "__main__":
     host = os.getenv("MCP_HOST", "0.0.0.0")
     port = int(os.getenv("MCP_PORT", "8000"))
-    mcp.run(transport="streamable-http", host=host, port=port)
+    _get_mcp().run(transport="streamable-http", host=host, port=port)
@@ -10,6 +10,7 @@ Usage:
   python scripts/eval_ragas.py
   python scripts/eval_ragas.py --data path/to/samples.json
   python scripts/eval_ragas.py --output results.json
+  python scripts/eval_ragas.py --max-workers 4
 
 See Documentation/Observability_Details.md for where RAGAS sits in the project.
 """
@@ -20,6 +21,7 @@ import json
 import os
 import sys
 from pathlib import Path
+from typing import Iterator
 
 # Add project root for imports if running from repo root
 _REPO_ROOT = Path(__file__).resolve().parent.parent
@@ -57,23 +59,50 @@ def _get_sample_dataset() -> list[dict]:
     ]
 
 
+# Above this size, stream top-level JSON arrays with ijson (if installed) instead of parsing the whole file at once
+_STREAM_THRESHOLD_BYTES = 50 * 1024 * 1024
+
+
+def _iter_json_rows(path: str) -> Iterator[dict]:
+    """Yield samples from a JSON file (array or single object). Uses ijson/orjson when available, else json."""
+    if os.path.getsize(path) > _STREAM_THRESHOLD_BYTES:
+        try:
+            import ijson
+        except ImportError:
+            ijson = None
+        if ijson is not None:
+            with open(path, "rb") as f:
+                head = f.read(64).lstrip()
+                f.seek(0)
+                if head.startswith(b"["):
+                    yield from ijson.items(f, "item")
+                    return
+    try:
+        import orjson
+        data = orjson.loads(Path(path).read_bytes())
+    except ImportError:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    if not isinstance(data, list):
+        data = [data]
+    yield from data
+
+
 def load_dataset_from_json(path: str) -> list[dict]:
     """Load evaluation samples from a JSON file.
 
     Expected format: list of objects with keys user_input, retrieved_contexts (list of str),
     response, and optionally reference.
     """
-    with open(path, encoding="utf-8") as f:
-        data = json.load(f)
-    if not isinstance(data, list):
-        data = [data]
-    for i, row in enumerate(data):
+    data: list[dict] = []
+    for i, row in enumerate(_iter_json_rows(path)):
         if "user_input" not in row or "retrieved_contexts" not in row or "response" not in row:
             raise ValueError(
                 f"Row {i}: each sample must have user_input, retrieved_contexts, response."
             )
         if isinstance(row["retrieved_contexts"], str):
             row["retrieved_contexts"] = [row["retrieved_contexts"]]
+        data.append(row)
     return data
 
 
@@ -81,6 +110,7 @@ def run_evaluation(
     dataset_list: list[dict],
     evaluator_model: str = "gpt-4o-mini",
     metrics_only: tuple[str, ...] = ("faithfulness", "answer_relevancy"),
+    max_workers: int | None = None,
 ) -> dict:
     """Run RAGAS evaluate() on the dataset. Returns dict of metric name -> score."""
     try:
@@ -103,12 +133,13 @@ def run_evaluation(
         print("OPENAI_API_KEY is required for RAGAS evaluator LLM.", file=sys.stderr)
         raise SystemExit(1)
 
-    from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+    from langchain_openai import ChatOpenAI
 
     llm = ChatOpenAI(model=evaluator_model, temperature=0)
     evaluator_llm = LangchainLLMWrapper(llm)
-    embeddings = OpenAIEmbeddings()
 
+    # from_list is the direct path: EvaluationDataset holds one sample object per row, and
+    # from_hf_dataset/from_pandas round-trip through a list of dicts anyway.
     evaluation_dataset = EvaluationDataset.from_list(dataset_list)
 
     metrics = []
@@ -122,6 +153,13 @@ def run_evaluation(
         if AnswerRelevancyCls:
             metrics.append(AnswerRelevancyCls())
 
+    # Only answer relevancy needs embeddings; skip the client for faithfulness-only runs
+    need_embeddings = AnswerRelevancyCls is not None and any(isinstance(m, AnswerRelevancyCls) for m in metrics)
+    embeddings = None
+    if need_embeddings:
+        from langchain_openai import OpenAIEmbeddings
+        embeddings = OpenAIEmbeddings()
+
     eval_kw: dict = {
         "dataset": evaluation_dataset,
         "metrics": metrics,
@@ -130,6 +168,15 @@ def run_evaluation(
     if embeddings is not None:
         eval_kw["embeddings"] = embeddings
 
+    # Bounded concurrency + backoff so large datasets don't trip evaluator LLM rate limits
+    try:
+        from ragas.run_config import RunConfig
+    except ImportError:
+        RunConfig = None
+    if RunConfig is not None:
+        workers = max_workers or int(os.getenv("RAGAS_MAX_WORKERS", "8"))
+        eval_kw["run_config"] = RunConfig(max_workers=workers, max_retries=10, max_wait=60, timeout=180)
+
     result = evaluate(**eval_kw)
 
     # Result is EvaluationResult; extract scores (structure may vary by ragas version)
@@ -141,11 +188,15 @@ def run_evaluation(
             out = result.scores
         else:
             out = {"result": str(result.scores)}
-    if hasattr(result, "to_pandas") and result.to_pandas() is not None:
-        df = result.to_pandas()
-        if not df.empty and "faithfulness" in df.columns:
+    # Only materialize a DataFrame when the scores above don't already cover the requested metrics
+    requested = [getattr(m, "name", "") for m in metrics]
+    if out and all(name in out for name in requested):
+        return out
+    df = result.to_pandas() if hasattr(result, "to_pandas") else None
+    if df is not None and not df.empty:
+        if "faithfulness" in df.columns:
             out["faithfulness"] = float(df["faithfulness"].mean())
-        if not df.empty and "answer_relevancy" in df.columns:
+        if "answer_relevancy" in df.columns:
             out["answer_relevancy"] = float(df["answer_relevancy"].mean())
     return out if out else {"raw": str(result)}
 
@@ -172,6 +223,12 @@ def main() -> None:
         default="gpt-4o-mini",
         help="Evaluator LLM model (default: gpt-4o-mini).",
     )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=0,
+        help="Max concurrent evaluator LLM calls (default: RAGAS_MAX_WORKERS or 8). Lower it if you hit rate limits.",
+    )
     args = parser.parse_args()
 
     if args.data:
@@ -181,7 +238,7 @@ def main() -> None:
         dataset_list = _get_sample_dataset()
         print("Using built-in sample dataset (3 samples).", file=sys.stderr)
 
-    scores = run_evaluation(dataset_list, evaluator_model=args.model)
+    scores = run_evaluation(dataset_list, evaluator_model=args.model, max_workers=args.max_workers or None)
     out_text = json.dumps(scores, indent=2)
 
     if args.output:
@@ -1,9 +1,10 @@
 """AgentOps: circuit breaker, failover, and health for agent pools."""
-from .circuit_breaker import CircuitBreaker, CircuitState
+from .circuit_breaker import CircuitBreaker, CircuitState, get_circuit_breaker
 from .health import get_agent_ops_health
 
 __all__ = [
     "CircuitBreaker",
     "CircuitState",
     "get_agent_ops_health",
+    "get_circuit_breaker",
 ]
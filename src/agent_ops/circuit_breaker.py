@@ -1,9 +1,13 @@
 """Circuit breaker for agent pools: avoid repeatedly calling failing agents."""
+import functools
+import threading
 import time
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Optional
 
+from ..config import config
+
 
 class CircuitState(str, Enum):
     """Circuit state: closed = normal, open = failing, half_open = probing."""
@@ -12,12 +16,13 @@ class CircuitState(str, Enum):
     HALF_OPEN = "half_open"
 
 
-@dataclass
+@dataclass(slots=True)
 class _AgentCircuit:
     """Per-agent circuit state."""
     failure_count: int = 0
-    last_failure_time: float = 0.0
+    last_failure_ns: int = 0  # time.monotonic_ns() of the last failure
     state: CircuitState = CircuitState.CLOSED
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
 
 
 class CircuitBreaker:
@@ -34,61 +39,96 @@ class CircuitBreaker:
     ) -> None:
         self.failure_threshold = max(1, failure_threshold)
         self.cooldown_seconds = max(1.0, cooldown_seconds)
+        self._cooldown_ns = int(self.cooldown_seconds * 1_000_000_000)
         self._circuits: dict[str, _AgentCircuit] = {}
+        # Guards circuit creation only; state changes take the per-circuit lock
+        self._lock = threading.Lock()
 
-    def _get_circuit(self, agent_id: str) -> _AgentCircuit:
-        if agent_id not in self._circuits:
-            self._circuits[agent_id] = _AgentCircuit()
-        return self._circuits[agent_id]
+    def _circuit(self, agent_id: str) -> _AgentCircuit:
+        c = self._circuits.get(agent_id)
+        if c is None:
+            with self._lock:
+                c = self._circuits.get(agent_id)
+                if c is None:
+                    c = self._circuits[agent_id] = _AgentCircuit()
+        return c
 
-    def _maybe_transition_from_open(self, agent_id: str) -> None:
-        c = self._get_circuit(agent_id)
+    def _maybe_transition(self, c: _AgentCircuit, now_ns: Optional[int] = None) -> None:
+        """Move open → half_open once cooldown has elapsed. Caller holds c.lock."""
         if c.state != CircuitState.OPEN:
             return
-        if time.monotonic() - c.last_failure_time >= self.cooldown_seconds:
+        if (now_ns if now_ns is not None else time.monotonic_ns()) - c.last_failure_ns >= self._cooldown_ns:
             c.state = CircuitState.HALF_OPEN
             c.failure_count = 0
 
     def record_success(self, agent_id: str) -> None:
         """Record a successful invocation; closes the circuit."""
-        c = self._get_circuit(agent_id)
-        c.failure_count = 0
-        c.state = CircuitState.CLOSED
+        c = self._circuit(agent_id)
+        with c.lock:
+            c.failure_count = 0
+            c.state = CircuitState.CLOSED
 
     def record_failure(self, agent_id: str) -> None:
         """Record a failed invocation; may open the circuit."""
-        c = self._get_circuit(agent_id)
-        c.last_failure_time = time.monotonic()
-        c.failure_count += 1
-        if c.state == CircuitState.HALF_OPEN:
-            c.state = CircuitState.OPEN
-        elif c.failure_count >= self.failure_threshold:
-            c.state = CircuitState.OPEN
+        c = self._circuit(agent_id)
+        with c.lock:
+            c.last_failure_ns = time.monotonic_ns()
+            c.failure_count += 1
+            if c.state == CircuitState.HALF_OPEN:
+                c.state = CircuitState.OPEN
+            elif c.failure_count >= self.failure_threshold:
+                c.state = CircuitState.OPEN
 
     def is_available(self, agent_id: str) -> bool:
         """
         Return True if the agent may be invoked (circuit closed or half_open).
         Updates open → half_open when cooldown has elapsed.
         """
-        self._maybe_transition_from_open(agent_id)
-        c = self._get_circuit(agent_id)
-        return c.state in (CircuitState.CLOSED, CircuitState.HALF_OPEN)
+        c = self._circuit(agent_id)
+        with c.lock:
+            self._maybe_transition(c)
+            return c.state in (CircuitState.CLOSED, CircuitState.HALF_OPEN)
 
     def get_state(self, agent_id: str) -> CircuitState:
         """Return current circuit state for the agent."""
-        self._maybe_transition_from_open(agent_id)
-        return self._get_circuit(agent_id).state
+        c = self._circuit(agent_id)
+        with c.lock:
+            self._maybe_transition(c)
+            return c.state
+
+    def get_states(self, agent_ids: list[str]) -> dict[str, CircuitState]:
+        """Return current circuit state for several agents in one pass (single clock read)."""
+        now_ns = time.monotonic_ns()
+        out: dict[str, CircuitState] = {}
+        for aid in agent_ids:
+            c = self._circuit(aid)
+            with c.lock:
+                self._maybe_transition(c, now_ns)
+                out[aid] = c.state
+        return out
 
     def get_status(self, agent_id: str) -> dict:
         """Return status dict for health/reporting: state, failure_count, last_failure_time."""
-        self._maybe_transition_from_open(agent_id)
-        c = self._get_circuit(agent_id)
-        return {
-            "state": c.state.value,
-            "failure_count": c.failure_count,
-            "last_failure_time": c.last_failure_time,
-        }
+        c = self._circuit(agent_id)
+        with c.lock:
+            self._maybe_transition(c)
+            return {
+                "state": c.state.value,
+                "failure_count": c.failure_count,
+                "last_failure_time": c.last_failure_ns / 1_000_000_000,
+            }
 
     def get_all_agent_ids(self) -> list[str]:
         """Return all agent IDs that have been seen (have a circuit)."""
         return list(self._circuits.keys())
+
+
+@functools.lru_cache(maxsize=1)
+def get_circuit_breaker() -> Optional[CircuitBreaker]:
+    """Process-wide breaker shared by the supervisor and /health. None unless AGENT_OPS_ENABLED."""
+    if not config.agent_ops_enabled:
+        return None
+    return CircuitBreaker(
+        failure_threshold=config.circuit_breaker_failure_threshold,
+        cooldown_seconds=config.circuit_breaker_cooldown_seconds,
+    )
@@ -3,6 +3,13 @@ from typing import Any, Optional
 
 from .circuit_breaker import CircuitBreaker, CircuitState
 
+# Circuit state -> health label; any non-closed circuit degrades overall status
+_AGENT_HEALTH_LABELS: dict[CircuitState, str] = {
+    CircuitState.CLOSED: "healthy",
+    CircuitState.OPEN: "circuit_open",
+    CircuitState.HALF_OPEN: "half_open",
+}
+
 
 def get_agent_ops_health(
     circuit_breaker: Optional[CircuitBreaker] = None,
@@ -16,16 +23,10 @@ def get_agent_ops_health(
     status = "ok"
     agents: dict[str, str] = {}
     if circuit_breaker and agent_ids:
-        for aid in agent_ids:
-            state = circuit_breaker.get_state(aid)
-            if state == CircuitState.OPEN:
-                agents[aid] = "circuit_open"
-                status = "degraded"
-            elif state == CircuitState.HALF_OPEN:
-                agents[aid] = "half_open"
+        for aid, state in circuit_breaker.get_states(agent_ids).items():
+            agents[aid] = _AGENT_HEALTH_LABELS[state]
+            if state != CircuitState.CLOSED:
                 status = "degraded"
-            else:
-                agents[aid] = "healthy"
     elif agent_ids:
         for aid in agent_ids:
             agents[aid] = "healthy"
@@ -1,19 +1,22 @@
 """FastAPI entrypoint: receives message → router → supervisor graph → response; GraphQL for conversation history."""
-from typing import Optional
+import asyncio
+from typing import Any, AsyncIterator, Optional
 
 import strawberry
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from langchain_core.messages import HumanMessage
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict
+from langchain_core.messages import AIMessageChunk, HumanMessage
 from strawberry.fastapi import GraphQLRouter
 
 from .config import config
 from .router import SessionRouter, RouterResult
-from .supervisor import build_supervisor
-from .shared_services.conversation_store import ConversationStore, InMemoryConversationStore
+from .supervisor import get_supervisor
+from .shared_services.conversation_store import ConversationStore, InMemoryConversationStore, RedisConversationStore
 from .graphql.conversation_schema import Query as GraphQLQuery
-from .agent_ops import CircuitBreaker, get_agent_ops_health
+from .agent_ops import CircuitBreaker, get_agent_ops_health, get_circuit_breaker
+from .shared_services.guardrails import GuardrailService, SimpleGuardrailService, StubGuardrailService
+from .shared_services.http import aclose_http_clients
 from .hitl.ticket import get_pending_escalations, clear_pending_escalation
 
 # --- App setup ---
@@ -22,15 +25,21 @@ app = FastAPI(title="Agentic Production Framework", version="0.1.0")
 router_svc = SessionRouter()
 
 # AgentOps: circuit breaker shared between supervisor and /health
-circuit_breaker: Optional[CircuitBreaker] = None
-if config.agent_ops_enabled:
-    circuit_breaker = CircuitBreaker(
-        failure_threshold=config.circuit_breaker_failure_threshold,
-        cooldown_seconds=config.circuit_breaker_cooldown_seconds,
-    )
-
-supervisor = build_supervisor(use_checkpointer=True, circuit_breaker=circuit_breaker)
-conversation_store: ConversationStore = InMemoryConversationStore()
+circuit_breaker: Optional[CircuitBreaker] = get_circuit_breaker()
+
+# Compiled once per process (memoized); async checkpointer: /chat drives the graph with ainvoke so the event loop is never blocked
+supervisor = get_supervisor(async_checkpointer=True)
+# Conversation history: Redis streams when REDIS_URL is set (durable, shared by workers), else bounded in-memory
+conversation_store: ConversationStore = (
+    RedisConversationStore(config.redis_url, max_turns=config.conversation_max_turns)
+    if config.redis_url
+    else InMemoryConversationStore(max_turns=config.conversation_max_turns)
+)
+
+# Output guardrail for /chat/stream (agents guard their own buffered replies)
+output_guardrail: GuardrailService = SimpleGuardrailService() if config.guardrails_enabled else StubGuardrailService()
+# ReAct scratchpad (Thought/Action) must not be streamed; those replies are sent whole once the graph finishes
+use_react = getattr(config, "use_react", False)
 
 # Agent IDs used by supervisor (for health reporting)
 AGENT_IDS = ["support", "billing"]
@@ -45,16 +54,30 @@ graphql_app = GraphQLRouter(graphql_schema, context_getter=get_graphql_context)
 app.include_router(graphql_app, prefix="/graphql")
 
 
+@app.on_event("startup")
+async def setup_checkpointer() -> None:
+    """Create Redis checkpoint indexes once the event loop is running (no-op for in-memory)."""
+    checkpointer = getattr(supervisor, "checkpointer", None)
+    if hasattr(checkpointer, "asetup"):
+        await checkpointer.asetup()
+
+
+@app.on_event("shutdown")
+async def close_http_clients() -> None:
+    """Close the shared LLM HTTP connection pools."""
+    await aclose_http_clients()
+
+
 # --- HITL (human-in-the-loop) endpoints ---
 
 @app.get("/hitl/pending")
-def hitl_pending():
+async def hitl_pending():
     """Return pending escalations (sessions waiting for a human). Populated when HITL_HANDLER=ticket."""
     return get_pending_escalations()
 
 
 @app.post("/hitl/pending/{session_id}/clear")
-def hitl_clear(session_id: str):
+async def hitl_clear(session_id: str):
     """Mark a session as picked up by a human (remove from pending list)."""
     clear_pending_escalation(session_id)
     return {"session_id": session_id, "cleared": True}
@@ -64,6 +87,9 @@ def hitl_clear(session_id: str):
 
 class ChatRequest(BaseModel):
     """Incoming chat message."""
+    # Immutable once validated; returned/passed instances are never re-validated
+    model_config = ConfigDict(frozen=True, revalidate_instances="never")
+
     user_id: str
     message: str
     session_id: Optional[str] = None
@@ -71,6 +97,8 @@ class ChatRequest(BaseModel):
 
 class ChatResponse(BaseModel):
     """Chat reply."""
+    model_config = ConfigDict(frozen=True, revalidate_instances="never")
+
     session_id: str
     reply: str
     agent_id: Optional[str] = None
@@ -79,7 +107,7 @@ class ChatResponse(BaseModel):
 # --- Endpoints ---
 
 @app.get("/health")
-def health():
+async def health():
     """
     Health check. When AgentOps is enabled, returns agent circuit states and MCP status.
     status: ok | degraded (e.g. one or more agents circuit_open or MCP unavailable).
@@ -96,14 +124,39 @@ def health():
     return {"status": "ok"}
 
 
-@app.post("/chat", response_model=ChatResponse)
-def chat(req: ChatRequest) -> ChatResponse:
-    """
-    Chat endpoint: message → router → supervisor → reply.
-    Mimics chatbot: user sends message, gets reply from appropriate agent.
-    """
-    # 1. Route: get session_id + suggested agent pool IDs
-    route_result: RouterResult = router_svc.route(
+def _record_langfuse_score(langfuse_handler: Any, result: dict) -> None:
+    """Attach faithfulness score to the Langfuse trace and flush (blocking network I/O; run off the event loop)."""
+    try:
+        from langfuse import get_client as get_langfuse_client
+        langfuse_client = get_langfuse_client()
+        faith = result.get("faithfulness_score")
+        trace_id = getattr(langfuse_handler, "last_trace_id", None) or getattr(langfuse_handler, "get_trace_id", lambda: None)()
+        if faith is not None and trace_id:
+            if hasattr(langfuse_client, "create_score"):
+                langfuse_client.create_score(
+                    trace_id=trace_id,
+                    name="faithfulness",
+                    value=float(faith),
+                    comment="TFFaithfulnessScorer or stub vs RAG context",
+                )
+            elif hasattr(langfuse_client, "score"):
+                langfuse_client.score(
+                    trace_id=trace_id,
+                    name="faithfulness",
+                    value=float(faith),
+                    comment="TFFaithfulnessScorer or stub vs RAG context",
+                )
+        langfuse_client.flush()
+    except Exception:
+        pass
+
+
+async def _prepare_run(req: ChatRequest) -> tuple[str, dict, dict, Any]:
+    """Route the message and build (thread_id, initial_state, run_config, langfuse_handler) for the supervisor."""
+    # 1. Route: get session_id + suggested agent pool IDs. Off the event loop: intent classification may run
+    # TF inference (or first-use training) and the intent cache makes blocking Redis calls.
+    route_result: RouterResult = await asyncio.to_thread(
+        router_svc.route,
         user_id=req.user_id,
         message=req.message,
         session_id=req.session_id,
@@ -132,58 +185,131 @@ def chat(req: ChatRequest) -> ChatResponse:
             }
         except Exception:
             langfuse_handler = None
+    return thread_id, initial_state, run_config, langfuse_handler
 
-    # 3. Invoke supervisor graph
-    try:
-        result = supervisor.invoke(initial_state, run_config)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) from e
-
-    # 4. Langfuse: attach faithfulness score to trace and flush
-    if langfuse_handler is not None:
-        try:
-            from langfuse import get_client as get_langfuse_client
-            langfuse_client = get_langfuse_client()
-            faith = result.get("faithfulness_score")
-            trace_id = getattr(langfuse_handler, "last_trace_id", None) or getattr(langfuse_handler, "get_trace_id", lambda: None)()
-            if faith is not None and trace_id:
-                if hasattr(langfuse_client, "create_score"):
-                    langfuse_client.create_score(
-                        trace_id=trace_id,
-                        name="faithfulness",
-                        value=float(faith),
-                        comment="TFFaithfulnessScorer or stub vs RAG context",
-                    )
-                elif hasattr(langfuse_client, "score"):
-                    langfuse_client.score(
-                        trace_id=trace_id,
-                        name="faithfulness",
-                        value=float(faith),
-                        comment="TFFaithfulnessScorer or stub vs RAG context",
-                    )
-            langfuse_client.flush()
-        except Exception:
-            pass
 
-    # 5. Extract last AIMessage as reply
-    messages = result.get("messages", [])
-    reply = ""
-    for m in reversed(messages):
+def _extract_reply(result: dict) -> str:
+    """Last AIMessage content, or a fallback when the graph produced none."""
+    for m in reversed(result.get("messages", [])):
         if hasattr(m, "content") and m.type == "ai":
             reply = str(m.content)
+            if reply:
+                return reply
             break
+    return "I couldn't generate a response. Please try again."
 
-    if not reply:
-        reply = "I couldn't generate a response. Please try again."
 
-    agent_id = result.get("current_agent")
+async def _finish_run(thread_id: str, req: ChatRequest, result: dict, reply: str, langfuse_handler: Any) -> None:
+    """Langfuse score + persist the turn pair to the conversation store."""
+    # Langfuse: attach faithfulness score to trace and flush
+    if langfuse_handler is not None:
+        await asyncio.to_thread(_record_langfuse_score, langfuse_handler, result)
 
     # Persist to conversation store (long-term history for RAG / analytics)
-    conversation_store.append_turn(thread_id, "user", req.message)
-    conversation_store.append_turn(thread_id, "assistant", reply, metadata={"agent_id": agent_id})
+    # Awaited in sequence (not gathered) so the user turn is always stored before the reply
+    await conversation_store.aappend_turn(thread_id, "user", req.message)
+    await conversation_store.aappend_turn(thread_id, "assistant", reply, metadata={"agent_id": result.get("current_agent")})
+
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat(req: ChatRequest) -> ChatResponse:
+    """
+    Chat endpoint: message → router → supervisor → reply.
+    Mimics chatbot: user sends message, gets reply from appropriate agent.
+    """
+    thread_id, initial_state, run_config, langfuse_handler = await _prepare_run(req)
+
+    # 3. Invoke supervisor graph
+    try:
+        result = await supervisor.ainvoke(initial_state, run_config)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+    reply = _extract_reply(result)
+    await _finish_run(thread_id, req, result, reply, langfuse_handler)
 
     return ChatResponse(
         session_id=thread_id,
         reply=reply,
-        agent_id=agent_id,
+        agent_id=result.get("current_agent"),
     )
+
+
+@app.post("/chat/stream")
+async def chat_stream(req: ChatRequest) -> StreamingResponse:
+    """
+    Streaming chat: same graph as /chat, but the agent's answer tokens are sent as they are generated
+    (text/plain chunks), passed through the output guardrail's streaming filter. Session ID is in X-Session-Id.
+    """
+    thread_id, initial_state, run_config, langfuse_handler = await _prepare_run(req)
+
+    async def agent_tokens(state: dict) -> AsyncIterator[str]:
+        # "messages" mode surfaces LLM tokens from inside nodes; only the selected agent's answer is user-facing
+        # (planner output, tool-call turns and ReAct scratchpad text are not). A turn's text is held until that LLM
+        # call ends and released only if it made no tool calls: text written before a tool call is not the answer.
+        # Parallel agents race each other, so none of their text is streamed; the winner is sent once the graph ends.
+        turn_id: Optional[str] = None
+        turn_text: list[str] = []
+        tool_turn = False
+
+        def end_turn() -> str:
+            nonlocal turn_id, turn_text, tool_turn
+            text = "" if tool_turn else "".join(turn_text)
+            turn_id, turn_text, tool_turn = None, [], False
+            return text
+
+        async for mode, payload in supervisor.astream(initial_state, run_config, stream_mode=["messages", "values"]):
+            if mode == "values":
+                state.update(payload)
+                # A node finished: any LLM call inside it is over
+                text = end_turn()
+                if text:
+                    yield text
+                continue
+            chunk, meta = payload
+            # Whole messages returned by the node are re-emitted here too; only take streamed chunks
+            if not isinstance(chunk, AIMessageChunk) or meta.get("langgraph_node") != "invoke_agent" or use_react:
+                continue
+            if config.parallel_agents and len(state.get("candidate_agent_ids") or ()) > 1:
+                continue
+            if chunk.id != turn_id:
+                text = end_turn()
+                if text:
+                    yield text
+                turn_id = chunk.id
+            if chunk.tool_call_chunks:
+                tool_turn = True
+            elif isinstance(chunk.content, str) and chunk.content:
+                turn_text.append(chunk.content)
+            if chunk.response_metadata.get("finish_reason"):
+                text = end_turn()
+                if text:
+                    yield text
+
+    async def body() -> AsyncIterator[str]:
+        state: dict = {}
+        streamed: list[str] = []
+        try:
+            async for text in output_guardrail.filter_stream(agent_tokens(state)):
+                streamed.append(text)
+                yield text
+        except Exception:
+            if not streamed:
+                yield "I couldn't generate a response. Please try again."
+            return
+        reply = _extract_reply(state)
+        # The agent's (guarded) answer for this turn; reply is the last AI message, which differs when the graph
+        # appended to the answer (escalation notice)
+        answer = state.get("last_ai_response") or ""
+        if not streamed and answer and answer != reply:
+            # Answer not streamed (cache hit, early exit, ReAct, parallel agents) but followed by a notice: send it first
+            streamed.append(answer)
+            yield answer
+        if not streamed:
+            yield reply
+        elif reply != answer:
+            # Only what the graph added after the answer; the answer itself was already sent
+            yield "\n\n" + reply
+        await _finish_run(thread_id, req, state, reply, langfuse_handler)
+
+    return StreamingResponse(body(), media_type="text/plain; charset=utf-8", headers={"X-Session-Id": thread_id})
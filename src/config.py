@@ -1,4 +1,5 @@
 """Configuration for the agentic framework."""
+import functools
 import os
 from dataclasses import dataclass
 from dotenv import load_dotenv
@@ -6,7 +7,13 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
-@dataclass
+def _b(name: str, default: bool) -> bool:
+    """Boolean env var: "true" / "1" / "yes" (any case) are true; unset uses default."""
+    value = os.getenv(name)
+    return default if value is None else value.lower() in ("true", "1", "yes")
+
+
+@dataclass(frozen=True, slots=True)
 class Config:
     """App configuration from environment."""
     openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
@@ -15,28 +22,55 @@ class Config:
     hallucination_threshold_confidence: float = float(os.getenv("HALLUCINATION_THRESHOLD_CONFIDENCE", "0.7"))
     weaviate_url: str = os.getenv("WEAVIATE_URL", "")
     weaviate_index: str = os.getenv("WEAVIATE_INDEX", "RAGChunks")
+    # RAG request batching: coalesce concurrent retrievals into one backend call (batch size / max wait).
+    rag_batching_enabled: bool = _b("RAG_BATCHING_ENABLED", False)
+    rag_batch_size: int = int(os.getenv("RAG_BATCH_SIZE", "16"))
+    rag_batch_max_wait_ms: float = float(os.getenv("RAG_BATCH_MAX_WAIT_MS", "50"))
+    # Semantic response cache (support agent): reuse an answer when the prompt embedding is >= threshold cosine-similar.
+    semantic_cache_enabled: bool = _b("SEMANTIC_CACHE_ENABLED", False)
+    semantic_cache_threshold: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+    semantic_cache_ttl_seconds: float = float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "3600"))
+    semantic_cache_max_entries: int = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "10000"))
+    semantic_cache_embedding_model: str = os.getenv("SEMANTIC_CACHE_EMBEDDING_MODEL", "text-embedding-3-small")
+    # Conversation history in agent prompts: approx. token budget (last turns verbatim + summary of older ones). 0 = last 10 turns raw.
+    history_context_token_budget: int = int(os.getenv("HISTORY_CONTEXT_TOKEN_BUDGET", "1000"))
     # top_p: nucleus sampling; lower values = more focused, fewer hallucinations. 0.9 for factual support/billing.
     top_p: float = float(os.getenv("TOP_P", "0.9"))
     # Guardrails: enable input/output filtering (block off-topic, policy-violating content).
-    guardrails_enabled: bool = os.getenv("GUARDRAILS_ENABLED", "true").lower() in ("true", "1", "yes")
+    guardrails_enabled: bool = _b("GUARDRAILS_ENABLED", True)
     # Intent router: use TensorFlow classifier instead of keyword stub.
-    use_tf_intent: bool = os.getenv("USE_TF_INTENT", "false").lower() in ("true", "1", "yes")
+    use_tf_intent: bool = _b("USE_TF_INTENT", False)
     tf_intent_model_path: str = os.getenv("TF_INTENT_MODEL_PATH", "")
     # Faithfulness scoring: use TensorFlow-trained model instead of LLM (recommended for production).
-    use_tf_faithfulness: bool = os.getenv("USE_TF_FAITHFULNESS", "false").lower() in ("true", "1", "yes")
+    use_tf_faithfulness: bool = _b("USE_TF_FAITHFULNESS", False)
     tf_faithfulness_model_path: str = os.getenv("TF_FAITHFULNESS_MODEL_PATH", "")
+    # Score with an int8 TFLite export of the model (written next to it, keyed by the model file's hash); Keras if
+    # conversion fails. Off by default: int8 scores can differ from Keras near the escalation threshold.
+    tf_faithfulness_tflite: bool = _b("TF_FAITHFULNESS_TFLITE", False)
+    # Text handed to the faithfulness scorer is capped to these prefixes (0 = no cap); the TF model reads 500 chars of each.
+    faithfulness_max_response_chars: int = int(os.getenv("FAITHFULNESS_MAX_RESPONSE_CHARS", "1024"))
+    faithfulness_max_context_chars: int = int(os.getenv("FAITHFULNESS_MAX_CONTEXT_CHARS", "2048"))
+    # Replies shorter than this skip faithfulness scoring (0 = score every reply). Verbatim context quotes always skip.
+    faithfulness_min_response_chars: int = int(os.getenv("FAITHFULNESS_MIN_RESPONSE_CHARS", "0"))
+    # TF faithfulness: coalesce concurrent turns' scoring into one forward pass (batch size / max wait).
+    faithfulness_batching_enabled: bool = _b("FAITHFULNESS_BATCHING_ENABLED", False)
+    faithfulness_batch_size: int = int(os.getenv("FAITHFULNESS_BATCH_SIZE", "16"))
+    faithfulness_batch_max_wait_ms: float = float(os.getenv("FAITHFULNESS_BATCH_MAX_WAIT_MS", "5"))
 
     # AgentOps: circuit breaker and failover
-    agent_ops_enabled: bool = os.getenv("AGENT_OPS_ENABLED", "true").lower() in ("true", "1", "yes")
+    agent_ops_enabled: bool = _b("AGENT_OPS_ENABLED", True)
     circuit_breaker_failure_threshold: int = int(os.getenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "3"))
     circuit_breaker_cooldown_seconds: float = float(os.getenv("CIRCUIT_BREAKER_COOLDOWN_SECONDS", "60"))
-    failover_enabled: bool = os.getenv("FAILOVER_ENABLED", "true").lower() in ("true", "1", "yes")
+    failover_enabled: bool = _b("FAILOVER_ENABLED", True)
     failover_fallback_agent_id: str = os.getenv("FAILOVER_FALLBACK_AGENT_ID", "support")
     agent_invocation_timeout_seconds: float = float(os.getenv("AGENT_INVOCATION_TIMEOUT_SECONDS", "30"))
 
     # Optional agent patterns: Planning (supervisor), ReAct (agents)
-    use_planning: bool = os.getenv("USE_PLANNING", "false").lower() in ("true", "1", "yes")
-    use_react: bool = os.getenv("USE_REACT", "false").lower() in ("true", "1", "yes")
+    use_planning: bool = _b("USE_PLANNING", False)
+    # When several suggested agents are available, draft tool-free replies from all of them concurrently (graph.ainvoke);
+    # the agent with the most faithful draft then answers with its tools.
+    parallel_agents: bool = _b("PARALLEL_AGENTS", False)
+    use_react: bool = _b("USE_REACT", False)
     react_max_steps: int = int(os.getenv("REACT_MAX_STEPS", "10"))
 
     # Inference backend: which implementation handles main LLM calls.
@@ -44,18 +78,38 @@ class Config:
     inference_backend: str = os.getenv("INFERENCE_BACKEND", "openai").strip().lower()
     # When inference_backend is self_hosted: base URL of the inference server (e.g. http://vllm:8000).
     # Chat completions are called at {inference_url}/v1/chat/completions.
+    # Several servers: comma-separated URLs or a path to a JSON file of URLs (least-connections balancing).
     inference_url: str = os.getenv("INFERENCE_URL", "").strip()
     # Optional API key for self-hosted server (many accept any value; use "dummy" if not required).
     inference_api_key: str = os.getenv("INFERENCE_API_KEY", "dummy").strip()
+    # Self-hosted vLLM: send a per-prompt-version cache_salt so prefix-cache entries are scoped to the current prompt.
+    inference_prefix_cache_salt: bool = _b("INFERENCE_PREFIX_CACHE_SALT", False)
+    # Shared HTTP connection pool for all LLM clients in the process (agents, planner); MCP clients use the same limits.
+    # HTTP/2 is used when enabled and h2 is installed (pip install "httpx[http2]").
+    http2_enabled: bool = _b("HTTP2_ENABLED", True)
+    llm_max_connections: int = int(os.getenv("LLM_MAX_CONNECTIONS", "256"))
+    llm_max_keepalive_connections: int = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "128"))
+    # Fail fast on unreachable endpoints; reads still get the full AGENT_INVOCATION_TIMEOUT_SECONDS.
+    llm_connect_timeout_seconds: float = float(os.getenv("LLM_CONNECT_TIMEOUT_SECONDS", "5"))
 
     # Human-in-the-loop (HITL): when we escalate, create ticket / notify
-    hitl_enabled: bool = os.getenv("HITL_ENABLED", "true").lower() in ("true", "1", "yes")
+    hitl_enabled: bool = _b("HITL_ENABLED", True)
     hitl_handler: str = os.getenv("HITL_HANDLER", "ticket").strip().lower() or "stub"  # stub | ticket | email
     hitl_email_to: str = os.getenv("HITL_EMAIL_TO", "").strip()
+    # Cap on in-memory pending escalations (ticket handler); oldest are dropped beyond this.
+    max_pending_escalations: int = int(os.getenv("MAX_PENDING_ESCALATIONS", "1000"))
 
     # LangGraph checkpointer: Redis for production (reduces pod memory, survives restarts). Empty = in-memory.
     redis_url: str = os.getenv("REDIS_URL", "").strip()
     # Session checkpoint TTL in minutes (e.g. 1440 = 24h). Only used when redis_url is set. 0 = no expiry.
+    checkpoint_ttl_minutes: int = int(os.getenv("CHECKPOINT_TTL_MINUTES", "1440"))
+    # In-memory checkpointer (no redis_url): sessions kept per process, least recently used evicted beyond this.
+    memory_checkpoint_max_threads: int = int(os.getenv("MEMORY_CHECKPOINT_MAX_THREADS", "10000"))
+    # Conversation history store: turns kept per session (Redis stream MAXLEN ~ / in-memory ring buffer).
+    conversation_max_turns: int = int(os.getenv("CONVERSATION_MAX_TURNS", "500"))
+    # SessionRouter intent memo: LRU entries per process (0 = off); shared in Redis for TF intent when redis_url is set.
+    intent_cache_size: int = int(os.getenv("INTENT_CACHE_SIZE", "2048"))
+    intent_cache_ttl_seconds: int = int(os.getenv("INTENT_CACHE_TTL_SECONDS", "3600"))
 
     # Langfuse: classic observability (traces, spans, faithfulness score). Enable when keys are set.
     langfuse_enabled: bool = bool(os.getenv("LANGFUSE_SECRET_KEY", "").strip())
@@ -64,4 +118,10 @@ class Config:
     langfuse_base_url: str = os.getenv("LANGFUSE_BASE_URL", "https://cloud.langfuse.com").strip()
 
 
-config = Config()
+@functools.lru_cache(maxsize=1)
+def get_config() -> Config:
+    """Process-wide Config (env is read once, at import)."""
+    return Config()
+
+
+config = get_config()
@@ -1,8 +1,17 @@
 """GraphQL schema for conversation history query API."""
+import json
 from typing import Optional
 
 import strawberry
 
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:  # optional speed-up; stdlib json produces equivalent output
+    _dumps = json.dumps
+
 from ..shared_services.conversation_store import ConversationStore
 
 
@@ -15,12 +24,11 @@ class Turn:
 
     @classmethod
     def from_store_turn(cls, turn) -> "Turn":
-        import json
         meta = getattr(turn, "metadata", None)
         return cls(
             role=turn.role,
             content=turn.content,
-            metadata_json=json.dumps(meta) if meta else None,
+            metadata_json=_dumps(meta) if meta else None,
         )
 
 
@@ -42,7 +50,7 @@ class Query:
     """Conversation history queries."""
 
     @strawberry.field
-    def conversation(
+    async def conversation(
         self,
         info: strawberry.Info,
         session_id: str,
@@ -50,7 +58,7 @@ class Query:
     ) -> Optional[Conversation]:
         """Get conversation history for a session. Returns null if session not found."""
         store: ConversationStore = info.context["conversation_store"]
-        turns = store.get_history(session_id, limit=limit)
+        turns = await store.aget_history(session_id, limit=limit)
         if not turns:
             return None
         return Conversation(
@@ -59,10 +67,10 @@ class Query:
         )
 
     @strawberry.field
-    def sessions(self, info: strawberry.Info, limit: Optional[int] = 50) -> list[SessionInfo]:
+    async def sessions(self, info: strawberry.Info, limit: Optional[int] = 50) -> list[SessionInfo]:
         """List recent session IDs (e.g. for admin or dropdown)."""
         store: ConversationStore = info.context["conversation_store"]
-        session_ids = store.list_sessions(limit=limit)
+        session_ids = await store.alist_sessions(limit=limit)
         return [SessionInfo(session_id=sid) for sid in session_ids]
 
 
@@ -1,4 +1,6 @@
 """Human-in-the-loop (HITL): when escalation is triggered, notify or create ticket for humans."""
+import functools
+
 from .base import HitlHandler, EscalationContext
 from .stub import StubHitlHandler
 from .ticket import TicketHitlHandler
@@ -14,8 +16,9 @@ __all__ = [
 ]
 
 
+@functools.lru_cache(maxsize=4)
 def get_hitl_handler(handler_name: str = "stub", enabled: bool = True, email_to: str = "") -> "HitlHandler":
-    """Return the configured HITL handler. handler_name: stub | ticket | email."""
+    """Return the configured HITL handler (one shared instance per argument set). handler_name: stub | ticket | email."""
     if not enabled:
         return StubHitlHandler()
     name = (handler_name or "stub").lower().strip()
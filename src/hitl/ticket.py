@@ -1,4 +1,8 @@
 """HITL handler: create a support ticket and record in pending escalations for human pickup."""
+import threading
+from collections import OrderedDict
+
+from ..config import config
 from .base import EscalationContext, HitlHandler
 
 # Lazy import to avoid circular deps; we only need the tool's logic
@@ -7,18 +11,30 @@ def _create_ticket(subject: str, description: str, priority: str = "high") -> st
     return create_support_ticket.invoke({"subject": subject, "description": description, "priority": priority})
 
 
-# In-memory store of pending escalations (session_id -> context summary) for dashboards/APIs
-_pending_escalations: dict[str, dict] = {}
+# In-memory store of pending escalations (session_id -> context summary) for dashboards/APIs.
+# Written from graph worker threads, read by the API: guarded by a lock, oldest evicted beyond MAX_PENDING_ESCALATIONS.
+_pending_escalations: "OrderedDict[str, dict]" = OrderedDict()
+_pending_lock = threading.Lock()
 
 
 def get_pending_escalations() -> dict[str, dict]:
-    """Return current pending escalations (session_id -> summary). For admin/API use."""
-    return dict(_pending_escalations)
+    """Return current pending escalations (session_id -> summary), oldest first. For admin/API use."""
+    with _pending_lock:
+        return dict(_pending_escalations)
 
 
 def clear_pending_escalation(session_id: str) -> None:
     """Remove a session from pending (e.g. when a human has picked it up)."""
-    _pending_escalations.pop(session_id, None)
+    with _pending_lock:
+        _pending_escalations.pop(session_id, None)
+
+
+def _add_pending_escalation(session_id: str, summary: dict) -> None:
+    with _pending_lock:
+        _pending_escalations[session_id] = summary
+        _pending_escalations.move_to_end(session_id)
+        while len(_pending_escalations) > config.max_pending_escalations:
+            _pending_escalations.popitem(last=False)
 
 
 class TicketHitlHandler(HitlHandler):
@@ -36,9 +52,9 @@ class TicketHitlHandler(HitlHandler):
             _create_ticket(subject=subject, description=description, priority="high")
         except Exception:
             pass
-        _pending_escalations[ctx.session_id] = {
+        _add_pending_escalation(ctx.session_id, {
             "session_id": ctx.session_id,
             "user_id": ctx.user_id,
             "reason": ctx.reason,
             "last_user_message": ctx.last_user_message,
-        }
+        })
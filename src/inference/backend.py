@@ -3,16 +3,41 @@
 - OpenAIBackend: uses OpenAI API via langchain_openai.ChatOpenAI.
 - SelfHostedBackend: uses an OpenAI-compatible HTTP API (e.g. vLLM, TensorRT-LLM)
   by pointing ChatOpenAI at base_url=INFERENCE_URL. Set INFERENCE_BACKEND=self_hosted
-  and INFERENCE_URL=http://your-server:8000 to use it.
+  and INFERENCE_URL=http://your-server:8000 to use it (several URLs: least-connections balancing).
 """
 from __future__ import annotations
 
+import threading
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from typing import Any, Sequence
 
 from langchain_openai import ChatOpenAI
 
 from ..config import config
+from ..shared_services.http import get_async_http_client, get_http_client
+from .balancer import LeastConnectionsBalancer, LeastConnectionsLLM, parse_endpoints
+
+# One ChatOpenAI per distinct client config, shared by every agent in the process (all on the shared httpx pools).
+# LRU-bounded so per-call parameter variations can't grow it without limit.
+_CHAT_LLM_CACHE_SIZE = 64
+_chat_llm_cache: "OrderedDict[tuple, ChatOpenAI]" = OrderedDict()
+_chat_llm_lock = threading.Lock()
+
+
+def _cached_chat_openai(**kwargs: Any) -> ChatOpenAI:
+    """Return the process-wide ChatOpenAI for these kwargs. Tool binding wraps it per agent without a new client."""
+    key = tuple(sorted(kwargs.items()))
+    with _chat_llm_lock:
+        llm = _chat_llm_cache.get(key)
+        if llm is None:
+            llm = ChatOpenAI(http_client=get_http_client(), http_async_client=get_async_http_client(), **kwargs)
+            _chat_llm_cache[key] = llm
+            if len(_chat_llm_cache) > _CHAT_LLM_CACHE_SIZE:
+                _chat_llm_cache.popitem(last=False)
+        else:
+            _chat_llm_cache.move_to_end(key)
+        return llm
 
 
 class LlmBackend(ABC):
@@ -39,6 +64,10 @@ class LlmBackend(ABC):
     ) -> Any:
         """Return an object with .invoke(messages) that takes/returns plain messages."""
 
+    def bind_tools(self, llm: Any, tools: Sequence[Any]) -> Any:
+        """Bind tools to an LLM from create_text_llm; the result shares that LLM's client."""
+        return llm.bind_tools(list(tools))
+
 
 class OpenAIBackend(LlmBackend):
     """Default backend using OpenAI's ChatCompletion via langchain_openai."""
@@ -51,8 +80,7 @@ class OpenAIBackend(LlmBackend):
         temperature: float,
         top_p: float,
     ) -> Any:
-        llm = ChatOpenAI(model=model, temperature=temperature, top_p=top_p)
-        return llm.bind_tools(list(tools))
+        return self.bind_tools(self.create_text_llm(model, temperature=temperature, top_p=top_p), tools)
 
     def create_text_llm(
         self,
@@ -61,7 +89,7 @@ class OpenAIBackend(LlmBackend):
         temperature: float,
         top_p: float,
     ) -> Any:
-        return ChatOpenAI(model=model, temperature=temperature, top_p=top_p)
+        return _cached_chat_openai(model=model, temperature=temperature, top_p=top_p)
 
 
 class SelfHostedBackend(LlmBackend):
@@ -69,26 +97,38 @@ class SelfHostedBackend(LlmBackend):
 
     Requires INFERENCE_URL (e.g. http://vllm:8000). Requests go to
     {base_url}/v1/chat/completions. Use INFERENCE_API_KEY if your server expects one.
+    INFERENCE_URL may list several servers (comma-separated, or a JSON file of URLs); each call then goes to the
+    one with the fewest in-flight requests.
     """
 
     def __init__(self, api_url: str | None = None, api_key: str | None = None) -> None:
-        self.api_url = (api_url or getattr(config, "inference_url", "") or "").rstrip("/")
+        self.api_urls = parse_endpoints(api_url or getattr(config, "inference_url", "") or "")
         self.api_key = api_key if api_key is not None else getattr(config, "inference_api_key", "dummy")
-        if not self.api_url:
+        if not self.api_urls:
             raise ValueError(
                 "Self-hosted inference requires INFERENCE_URL (e.g. http://vllm:8000). "
                 "Set it in env or use INFERENCE_BACKEND=openai."
             )
-        self.base_url = f"{self.api_url}/v1"
+        self.api_url = self.api_urls[0]
+        self.base_urls = [f"{u}/v1" for u in self.api_urls]
+        self.base_url = self.base_urls[0]
+        # One balancer per backend: every model / temperature variant shares the same in-flight counts
+        self.balancer = LeastConnectionsBalancer(self.base_urls) if len(self.base_urls) > 1 else None
 
     def _chat_openai(self, model: str, *, temperature: float, top_p: float) -> Any:
-        return ChatOpenAI(
-            base_url=self.base_url,
-            api_key=self.api_key,
-            model=model,
-            temperature=temperature,
-            top_p=top_p,
-        )
+        llms = [
+            _cached_chat_openai(
+                base_url=base_url,
+                api_key=self.api_key,
+                model=model,
+                temperature=temperature,
+                top_p=top_p,
+            )
+            for base_url in self.base_urls
+        ]
+        if self.balancer is None:
+            return llms[0]
+        return LeastConnectionsLLM(llms, self.balancer)
 
     def create_tool_llm(
         self,
@@ -98,8 +138,7 @@ class SelfHostedBackend(LlmBackend):
         temperature: float,
         top_p: float,
     ) -> Any:
-        llm = self._chat_openai(model=model, temperature=temperature, top_p=top_p)
-        return llm.bind_tools(list(tools))
+        return self.bind_tools(self._chat_openai(model=model, temperature=temperature, top_p=top_p), tools)
 
     def create_text_llm(
         self,
@@ -112,23 +151,27 @@ class SelfHostedBackend(LlmBackend):
 
 
 _backend_singleton: LlmBackend | None = None
+_backend_lock = threading.Lock()
 
 
 def get_llm_backend() -> LlmBackend:
     """Return a singleton LlmBackend based on config.inference_backend."""
     global _backend_singleton
+    # Lock-free once built; double-checked under the lock so concurrent first calls build one backend (one pool)
     if _backend_singleton is not None:
         return _backend_singleton
-
-    backend_name = getattr(config, "inference_backend", "openai") or "openai"
-    backend_name = backend_name.strip().lower()
-
-    if backend_name == "openai":
-        _backend_singleton = OpenAIBackend()
-    elif backend_name in ("self_hosted", "self-hosted", "local"):
-        _backend_singleton = SelfHostedBackend()
-    else:
-        # Fallback to OpenAI but make the choice explicit
-        _backend_singleton = OpenAIBackend()
-    return _backend_singleton
-
+    with _backend_lock:
+        if _backend_singleton is not None:
+            return _backend_singleton
+
+        backend_name = getattr(config, "inference_backend", "openai") or "openai"
+        backend_name = backend_name.strip().lower()
+
+        if backend_name == "openai":
+            _backend_singleton = OpenAIBackend()
+        elif backend_name in ("self_hosted", "self-hosted", "local"):
+            _backend_singleton = SelfHostedBackend()
+        else:
+            # Fallback to OpenAI but make the choice explicit
+            _backend_singleton = OpenAIBackend()
+        return _backend_singleton
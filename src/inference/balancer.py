@@ -0,0 +1,133 @@
+"""Least-connections routing across several OpenAI-compatible inference endpoints (e.g. one vLLM server per GPU)."""
+from __future__ import annotations
+
+import contextlib
+import itertools
+import json
+import threading
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator, Optional, Sequence
+
+from langchain_core.runnables import Runnable, RunnableConfig
+
+
+def parse_endpoints(value: str) -> list[str]:
+    """
+    INFERENCE_URL: one URL, a comma-separated list, or a path to a JSON file holding either a list of URLs
+    or {"endpoints": [...]}. Trailing slashes are stripped; order and duplicates are preserved as given.
+    """
+    value = (value or "").strip()
+    if value.endswith(".json") and Path(value).is_file():
+        data = json.loads(Path(value).read_text())
+        urls = data.get("endpoints", []) if isinstance(data, dict) else data
+    else:
+        urls = value.split(",")
+    return [u.strip().rstrip("/") for u in urls if u and u.strip()]
+
+
+class LeastConnectionsBalancer:
+    """Tracks in-flight requests per endpoint; slot() leases the least-loaded one (ties rotate) for the duration of a call."""
+
+    def __init__(self, endpoints: Sequence[str]) -> None:
+        if not endpoints:
+            raise ValueError("LeastConnectionsBalancer needs at least one endpoint")
+        self.endpoints = list(endpoints)
+        self._inflight = [0] * len(self.endpoints)
+        self._lock = threading.Lock()
+        self._rr = itertools.count()
+
+    def acquire(self, exclude: frozenset[int] = frozenset()) -> Optional[int]:
+        """Index of the least-loaded endpoint not in exclude (its count incremented), or None if all are excluded."""
+        n = len(self.endpoints)
+        with self._lock:
+            offset = next(self._rr) % n
+            best = None
+            for k in range(n):
+                i = (offset + k) % n
+                if i in exclude:
+                    continue
+                if best is None or self._inflight[i] < self._inflight[best]:
+                    best = i
+            if best is not None:
+                self._inflight[best] += 1
+            return best
+
+    def release(self, index: int) -> None:
+        with self._lock:
+            self._inflight[index] -= 1
+
+    @contextlib.contextmanager
+    def slot(self, exclude: frozenset[int] = frozenset()) -> Iterator[Optional[int]]:
+        index = self.acquire(exclude)
+        try:
+            yield index
+        finally:
+            if index is not None:
+                self.release(index)
+
+    def inflight(self) -> dict[str, int]:
+        """Snapshot of in-flight requests per endpoint (health / debugging)."""
+        with self._lock:
+            return dict(zip(self.endpoints, self._inflight))
+
+
+def _retryable(exc: BaseException) -> bool:
+    # Connection refused / reset: nothing was generated, another endpoint can take it. Timeouts are not retried
+    # (the request may still be running there and retrying would double the wait).
+    try:
+        import openai
+    except ImportError:
+        return False
+    return isinstance(exc, openai.APIConnectionError) and not isinstance(exc, openai.APITimeoutError)
+
+
+class LeastConnectionsLLM(Runnable):
+    """
+    Chat model facade over one client per endpoint (all built identically). Each call goes to the endpoint with the
+    fewest in-flight requests; on a connection error it is retried once on each remaining endpoint.
+    bind_tools() / bind() apply to every endpoint's client and keep the shared balancer.
+    """
+
+    def __init__(self, llms: Sequence[Any], balancer: LeastConnectionsBalancer) -> None:
+        if len(llms) != len(balancer.endpoints):
+            raise ValueError("LeastConnectionsLLM needs one client per balancer endpoint")
+        self.llms = list(llms)
+        self.balancer = balancer
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "LeastConnectionsLLM":
+        return LeastConnectionsLLM([llm.bind_tools(tools, **kwargs) for llm in self.llms], self.balancer)
+
+    def bind(self, **kwargs: Any) -> "LeastConnectionsLLM":
+        return LeastConnectionsLLM([llm.bind(**kwargs) for llm in self.llms], self.balancer)
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        failed: frozenset[int] = frozenset()
+        while True:
+            with self.balancer.slot(failed) as i:
+                try:
+                    return self.llms[i].invoke(input, config, **kwargs)
+                except Exception as e:
+                    failed |= {i}
+                    if not _retryable(e) or len(failed) == len(self.llms):
+                        raise
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        failed: frozenset[int] = frozenset()
+        while True:
+            with self.balancer.slot(failed) as i:
+                try:
+                    return await self.llms[i].ainvoke(input, config, **kwargs)
+                except Exception as e:
+                    failed |= {i}
+                    if not _retryable(e) or len(failed) == len(self.llms):
+                        raise
+
+    def stream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Iterator[Any]:
+        # No retry once tokens may have been emitted; the slot is held until the stream ends
+        with self.balancer.slot() as i:
+            yield from self.llms[i].stream(input, config, **kwargs)
+
+    async def astream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator[Any]:
+        with self.balancer.slot() as i:
+            async for chunk in self.llms[i].astream(input, config, **kwargs):
+                yield chunk
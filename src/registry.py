@@ -1,5 +1,6 @@
 """Agent Registry: metadata store for agent capabilities. Production: DynamoDB."""
 from abc import ABC, abstractmethod
+from collections import defaultdict
 from dataclasses import dataclass
 from typing import Optional
 
@@ -54,13 +55,17 @@ class InMemoryAgentRegistry(AgentRegistry):
                 model="gpt-4o",
             ),
         }
+        # Inverted index capability → agent IDs, built once; lookups don't touch agents that can't match
+        self._cap_index: dict[str, set[str]] = defaultdict(set)
+        for agent_id, agent in self._agents.items():
+            for cap in agent.capabilities:
+                self._cap_index[cap.lower()].add(agent_id)
+        self._rank = {agent_id: i for i, agent_id in enumerate(self._agents)}
 
     def get_agents_by_capability(self, capabilities: list[str]) -> list[AgentConfig]:
-        cap_set = set(c.lower() for c in capabilities)
-        return [
-            a for a in self._agents.values()
-            if any(c in cap_set for c in (c.lower() for c in a.capabilities))
-        ]
+        ids = {aid for c in capabilities for aid in self._cap_index.get(c.lower(), ())}
+        # Registry order, as before
+        return [self._agents[aid] for aid in sorted(ids, key=self._rank.__getitem__)]
 
     def get_agent(self, agent_id: str) -> Optional[AgentConfig]:
         return self._agents.get(agent_id)
@@ -1,4 +1,9 @@
 """Session Router: intent classification → suggested agent pool IDs. Keyword, TensorFlow, or Weaviate."""
+import functools
+import hashlib
+import logging
+import os
+import time
 import uuid
 from dataclasses import dataclass
 from typing import Optional
@@ -10,6 +15,27 @@ from .shared_services.intent_classifier import (
     TFIntentClassifier,
 )
 
+logger = logging.getLogger(__name__)
+
+# Cache key length: longer messages are classified directly (they rarely repeat verbatim)
+_INTENT_KEY_MAX_CHARS = 256
+_INTENT_REDIS_PREFIX = "intent:"
+
+
+def _uuid7() -> str:
+    """Time-ordered UUID (RFC 9562 v7): new sessions sort by creation time, giving key-range locality in stores."""
+    if hasattr(uuid, "uuid7"):  # Python 3.14+
+        return str(uuid.uuid7())
+    value = (time.time_ns() // 1_000_000 & (1 << 48) - 1) << 80 | int.from_bytes(os.urandom(10), "big")
+    value = value & ~(0xF << 76) | 0x7 << 76  # version 7
+    value = value & ~(0x3 << 62) | 0x2 << 62  # RFC 4122 variant
+    return str(uuid.UUID(int=value))
+
+
+def message_fingerprint(message: str) -> str:
+    """Stable 64-bit message digest (same in every process, unlike hash() under PYTHONHASHSEED)."""
+    return hashlib.blake2b(message.encode("utf-8"), digest_size=8).hexdigest()
+
 
 @dataclass
 class RouterResult:
@@ -33,6 +59,39 @@ class SessionRouter:
             self._classifier = TFIntentClassifier(model_path=config.tf_intent_model_path or None)
         else:
             self._classifier = KeywordIntentClassifier()
+        # Repeated messages ("help", "refund", greetings) skip the classifier; per instance, so a new
+        # classifier never sees stale results
+        self._classify = functools.lru_cache(maxsize=config.intent_cache_size)(self._classify_uncached)
+        # Shared cross-worker cache only pays off when classification costs more than a Redis round trip
+        self._redis = None
+        if config.redis_url and not isinstance(self._classifier, KeywordIntentClassifier):
+            import redis
+
+            self._redis = redis.Redis.from_url(config.redis_url, decode_responses=True)
+
+    def _classify_uncached(self, key: str) -> tuple[str, ...]:
+        if self._redis is None:
+            return tuple(self._classifier.classify(key))
+        rkey = _INTENT_REDIS_PREFIX + message_fingerprint(key)
+        try:
+            cached = self._redis.get(rkey)
+            if cached:
+                return tuple(cached.split(","))
+        except Exception as e:
+            logger.warning("intent cache read failed: %s", e)
+        result = tuple(self._classifier.classify(key))
+        try:
+            self._redis.set(rkey, ",".join(result), ex=config.intent_cache_ttl_seconds)
+        except Exception as e:
+            logger.warning("intent cache write failed: %s", e)
+        return result
+
+    def classify(self, message: str) -> list[str]:
+        """Suggested agent pool IDs, memoized on the normalized message (intent is case/whitespace-insensitive)."""
+        key = message.strip().lower()
+        if not config.intent_cache_size or len(key) > _INTENT_KEY_MAX_CHARS:
+            return self._classifier.classify(message)
+        return list(self._classify(key))
 
     def route(
         self,
@@ -44,10 +103,10 @@ class SessionRouter:
         Classify intent and return suggested agent pool IDs.
         Delegates to IntentClassifier (keyword or TensorFlow).
         """
-        sid = session_id or str(uuid.uuid4())
-        suggested = self._classifier.classify(message)
+        sid = session_id or _uuid7()
+        suggested = self.classify(message)
         return RouterResult(
             session_id=sid,
             suggested_agent_pool_ids=suggested,
-            embedding_cache_key=f"emb_{hash(message) % 10**8}",
+            embedding_cache_key=f"emb_{message_fingerprint(message)}",
         )
@@ -1,8 +1,25 @@
-"""Conversation store for long-term history. Production: DynamoDB."""
+"""Conversation store for long-term history. Production: DynamoDB or Redis streams."""
+import asyncio
+import itertools
+import json
+import threading
+import time
 from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
 from dataclasses import dataclass
 from typing import Any, Optional
 
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+
+    _loads = orjson.loads
+except ImportError:  # optional speed-up; stdlib json reads and writes the same documents
+    _dumps = json.dumps
+    _loads = json.loads
+
 
 @dataclass
 class Turn:
@@ -20,36 +37,134 @@ class ConversationStore(ABC):
         """Append a turn to the conversation."""
         pass
 
+    async def aappend_turn(self, session_id: str, role: str, content: str, metadata: Optional[dict] = None) -> None:
+        """Async append. Default runs append_turn in a worker thread so network-backed stores don't block the event loop."""
+        await asyncio.to_thread(self.append_turn, session_id, role, content, metadata)
+
     @abstractmethod
     def get_history(self, session_id: str, limit: Optional[int] = None) -> list[Turn]:
         """Get conversation history for a session."""
         pass
 
+    async def aget_history(self, session_id: str, limit: Optional[int] = None) -> list[Turn]:
+        """Async get_history. Default runs in a worker thread."""
+        return await asyncio.to_thread(self.get_history, session_id, limit)
+
     @abstractmethod
     def list_sessions(self, limit: Optional[int] = None) -> list[str]:
         """List session IDs (e.g. for GraphQL / admin). Order not guaranteed in stub."""
         pass
 
+    async def alist_sessions(self, limit: Optional[int] = None) -> list[str]:
+        """Async list_sessions. Default runs in a worker thread."""
+        return await asyncio.to_thread(self.list_sessions, limit)
+
 
 class InMemoryConversationStore(ConversationStore):
-    """In-memory stub. Replace with DynamoDB in production."""
+    """
+    In-memory stub. Replace with DynamoDB / Redis in production.
+    Bounded: a ring buffer of the last max_turns per session, and at most max_sessions sessions (least recently written evicted).
+    """
 
-    def __init__(self) -> None:
-        self._history: dict[str, list[Turn]] = {}
+    def __init__(self, max_turns: int = 500, max_sessions: int = 10000) -> None:
+        self.max_turns = max_turns
+        self.max_sessions = max_sessions
+        self._history: "OrderedDict[str, deque[Turn]]" = OrderedDict()
+        self._lock = threading.Lock()
 
     def append_turn(self, session_id: str, role: str, content: str, metadata: Optional[dict] = None) -> None:
-        if session_id not in self._history:
-            self._history[session_id] = []
-        self._history[session_id].append(Turn(role=role, content=content, metadata=metadata))
+        with self._lock:
+            turns = self._history.get(session_id)
+            if turns is None:
+                turns = self._history[session_id] = deque(maxlen=self.max_turns)
+                while len(self._history) > self.max_sessions:
+                    self._history.popitem(last=False)
+            else:
+                self._history.move_to_end(session_id)
+            turns.append(Turn(role=role, content=content, metadata=metadata))
+
+    async def aappend_turn(self, session_id: str, role: str, content: str, metadata: Optional[dict] = None) -> None:
+        # Pure in-memory write: no thread hop needed
+        self.append_turn(session_id, role, content, metadata)
 
     def get_history(self, session_id: str, limit: Optional[int] = None) -> list[Turn]:
-        turns = self._history.get(session_id, [])
-        if limit:
-            return turns[-limit:]
-        return turns
+        with self._lock:
+            turns = self._history.get(session_id, ())
+            # Copy only the requested tail, not the whole ring buffer
+            start = max(0, len(turns) - limit) if limit else 0
+            return list(itertools.islice(turns, start, None))
+
+    async def aget_history(self, session_id: str, limit: Optional[int] = None) -> list[Turn]:
+        return self.get_history(session_id, limit)
 
     def list_sessions(self, limit: Optional[int] = None) -> list[str]:
-        ids = list(self._history.keys())
+        """Most recently active first (writes move a session to the end), matching RedisConversationStore."""
+        with self._lock:
+            # Copy only the first `limit` keys, not the whole session map
+            return list(itertools.islice(reversed(self._history), limit or None))
+
+    async def alist_sessions(self, limit: Optional[int] = None) -> list[str]:
+        return self.list_sessions(limit)
+
+
+class RedisConversationStore(ConversationStore):
+    """
+    Redis streams: one capped stream per session (XADD conv:{session_id} MAXLEN ~ max_turns) plus a
+    sorted set of sessions by last activity. Durable across pod restarts; any Redis >= 5 works (no modules needed).
+    Sync methods use redis.Redis, async ones redis.asyncio.Redis, both from the same URL.
+    """
+
+    _SESSIONS_KEY = "conv:sessions"
+
+    def __init__(self, redis_url: str, max_turns: int = 500) -> None:
+        import redis
+        import redis.asyncio as aioredis
+
+        self.max_turns = max_turns
+        self._client = redis.Redis.from_url(redis_url, decode_responses=True)
+        self._aclient = aioredis.Redis.from_url(redis_url, decode_responses=True)
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return f"conv:{session_id}"
+
+    @staticmethod
+    def _fields(role: str, content: str, metadata: Optional[dict]) -> dict[str, str]:
+        return {"role": role, "content": content, "metadata": _dumps(metadata) if metadata else ""}
+
+    @staticmethod
+    def _to_turns(entries: list) -> list[Turn]:
+        return [
+            Turn(role=f.get("role", ""), content=f.get("content", ""), metadata=_loads(f["metadata"]) if f.get("metadata") else None)
+            for _, f in entries
+        ]
+
+    def append_turn(self, session_id: str, role: str, content: str, metadata: Optional[dict] = None) -> None:
+        # One round trip: stream append + session activity
+        pipe = self._client.pipeline(transaction=False)
+        pipe.xadd(self._key(session_id), self._fields(role, content, metadata), maxlen=self.max_turns, approximate=True)
+        pipe.zadd(self._SESSIONS_KEY, {session_id: time.time()})
+        pipe.execute()
+
+    async def aappend_turn(self, session_id: str, role: str, content: str, metadata: Optional[dict] = None) -> None:
+        pipe = self._aclient.pipeline(transaction=False)
+        pipe.xadd(self._key(session_id), self._fields(role, content, metadata), maxlen=self.max_turns, approximate=True)
+        pipe.zadd(self._SESSIONS_KEY, {session_id: time.time()})
+        await pipe.execute()
+
+    def get_history(self, session_id: str, limit: Optional[int] = None) -> list[Turn]:
+        if limit:
+            return self._to_turns(self._client.xrevrange(self._key(session_id), count=limit)[::-1])
+        return self._to_turns(self._client.xrange(self._key(session_id)))
+
+    async def aget_history(self, session_id: str, limit: Optional[int] = None) -> list[Turn]:
         if limit:
-            return ids[:limit]
-        return ids
+            return self._to_turns((await self._aclient.xrevrange(self._key(session_id), count=limit))[::-1])
+        return self._to_turns(await self._aclient.xrange(self._key(session_id)))
+
+    def list_sessions(self, limit: Optional[int] = None) -> list[str]:
+        """Most recently active first."""
+        return self._client.zrevrange(self._SESSIONS_KEY, 0, (limit or 0) - 1)
+
+    async def alist_sessions(self, limit: Optional[int] = None) -> list[str]:
+        return await self._aclient.zrevrange(self._SESSIONS_KEY, 0, (limit or 0) - 1)
@@ -1,8 +1,14 @@
 """Faithfulness scoring: rate how much agent response is supported by RAG context. TensorFlow-based trained model."""
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import os
+import queue
+import threading
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import Future
 from pathlib import Path
 
 
@@ -14,6 +20,18 @@ class FaithfulnessScorer(ABC):
         """Return faithfulness score in [0, 1]; higher = more grounded in context."""
         pass
 
+    def score_batch(self, pairs: list[tuple[str, str]]) -> list[float]:
+        """Score several (response, context) pairs. Default scores them one by one; model-backed scorers batch."""
+        return [self.score(r, c) for r, c in pairs]
+
+    async def ascore(self, response: str, context: str) -> float:
+        """Async score. Default runs in a worker thread so model inference doesn't block the event loop."""
+        return await asyncio.to_thread(self.score, response, context)
+
+    async def ascore_batch(self, pairs: list[tuple[str, str]]) -> list[float]:
+        """Async score_batch. Default runs in a worker thread."""
+        return await asyncio.to_thread(self.score_batch, pairs)
+
 
 class StubFaithfulnessScorer(FaithfulnessScorer):
     """Always returns 1.0 (no escalation from score)."""
@@ -21,6 +39,69 @@ class StubFaithfulnessScorer(FaithfulnessScorer):
     def score(self, response: str, context: str) -> float:
         return 1.0
 
+    async def ascore(self, response: str, context: str) -> float:
+        # Constant: no thread hop needed
+        return 1.0
+
+    async def ascore_batch(self, pairs: list[tuple[str, str]]) -> list[float]:
+        return [1.0] * len(pairs)
+
+    def score_batch(self, pairs: list[tuple[str, str]]) -> list[float]:
+        return [1.0] * len(pairs)
+
+
+class BatchingFaithfulnessScorer(FaithfulnessScorer):
+    """
+    Wraps a FaithfulnessScorer and coalesces concurrent score() calls into score_batch().
+    Callers block on (or await) a future; a background thread drains up to batch_size pairs or
+    waits at most max_wait_ms, so N concurrent turns cost ceil(N/batch_size) forward passes.
+    """
+
+    def __init__(self, scorer: FaithfulnessScorer, batch_size: int = 16, max_wait_ms: float = 5.0) -> None:
+        self.scorer = scorer
+        self.batch_size = max(1, batch_size)
+        self.max_wait_seconds = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue[tuple[str, str, Future]]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="faithfulness-batcher", daemon=True)
+        self._worker.start()
+
+    def score(self, response: str, context: str) -> float:
+        fut: Future = Future()
+        self._queue.put((response, context, fut))
+        return fut.result()
+
+    async def ascore(self, response: str, context: str) -> float:
+        # Await the batch future directly: no worker thread parked per caller
+        fut: Future = Future()
+        self._queue.put((response, context, fut))
+        return await asyncio.wrap_future(fut)
+
+    def score_batch(self, pairs: list[tuple[str, str]]) -> list[float]:
+        # Already a batch: straight to the wrapped scorer
+        return self.scorer.score_batch(pairs)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get(timeout=self.max_wait_seconds))
+            except queue.Empty:
+                pass
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: list[tuple[str, str, Future]]) -> None:
+        live = [item for item in batch if item[2].set_running_or_notify_cancel()]
+        if not live:
+            return
+        try:
+            scores = self.scorer.score_batch([(r, c) for r, c, _ in live])
+            for (_, _, fut), value in zip(live, scores):
+                fut.set_result(value)
+        except Exception as e:
+            for _, _, fut in live:
+                fut.set_exception(e)
+
 
 class TFFaithfulnessScorer(FaithfulnessScorer):
     """
@@ -33,16 +114,125 @@ class TFFaithfulnessScorer(FaithfulnessScorer):
     _MAX_LEN = 512  # combined text length (chars)
     _VOCAB_SIZE = 3000
     _EMBED_DIM = 32
+    _SEQ_LEN = 128  # tokens per input after TextVectorization
     _EPOCHS = 10
+    _CACHE_SIZE = 4096
 
-    def __init__(self, model_path: str | None = None) -> None:
+    def __init__(self, model_path: str | None = None, use_tflite: bool = False) -> None:
         self.model_path = model_path or str(self._DEFAULT_MODEL_DIR / "model.keras")
+        self.use_tflite = use_tflite
         self._model = None
+        self._predict = None
+        self._tflite: bytes | None = None  # int8 model content; interpreters are per thread
+        self._local = threading.local()
+        self._lock = threading.Lock()
         self._fallback = StubFaithfulnessScorer()
+        # Keyed by the formatted (already truncated) input; repeated answers over the same context are common.
+        # Shared by score() and score_batch() so a pair scores the same however it was batched.
+        self._cache: "OrderedDict[str, float]" = OrderedDict()
+        self._cache_lock = threading.Lock()
 
     def _get_model(self):
         if self._model is not None:
             return self._model
+        with self._lock:
+            if self._model is None:
+                model = self._load_or_train()
+                if model is not None:
+                    self._predict = self._compile_predict(model)
+                    if self.use_tflite:
+                        self._tflite = self._load_tflite(model)
+                self._model = model
+        return self._model
+
+    @staticmethod
+    def _compile_predict(model):
+        """Graph-compiled forward pass for a [N, 1] string batch (no per-call model.predict() setup)."""
+        import tensorflow as tf
+
+        @tf.function(input_signature=[tf.TensorSpec([None, 1], tf.string)])
+        def predict(inputs):
+            return model(inputs, training=False)
+
+        return predict
+
+    def _load_tflite(self, model) -> bytes | None:
+        """
+        int8 TFLite copy of everything after TextVectorization (exported next to the Keras model on first use).
+        The file name carries the Keras file's hash, so a retrained or replaced model gets a fresh export.
+        String lookup has no int8 builtin, so vectorization stays in TF. None (Keras path) if conversion fails.
+        """
+        from tensorflow import keras
+
+        vectorize = model.layers[0] if model.layers else None
+        if not isinstance(vectorize, keras.layers.TextVectorization):
+            return None
+        try:
+            with open(self.model_path, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()[:16]
+            path = f"{self.model_path}.{digest}.tflite"
+            if not os.path.isfile(path):
+                self._export_tflite(model, vectorize, path)
+            with open(path, "rb") as f:
+                content = f.read()
+        except Exception:
+            return None
+        self._vectorize = vectorize
+        return content
+
+    def _export_tflite(self, model, vectorize, path: str) -> None:
+        import tensorflow as tf
+        from tensorflow import keras
+
+        # Same layer objects (shared weights), fed token ids instead of strings
+        head = keras.Sequential([keras.Input(shape=(self._SEQ_LEN,), dtype="int64"), *model.layers[1:]])
+        texts, _ = self._synthetic_data()
+        tokens = vectorize(tf.constant(texts)).numpy()
+        converter = tf.lite.TFLiteConverter.from_keras_model(head)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        # Calibration for activation ranges; post-training quantization only, no retraining
+        converter.representative_dataset = lambda: ([tokens[i:i + 1]] for i in range(min(len(tokens), 200)))
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8, tf.lite.OpsSet.TFLITE_BUILTINS]
+        content = converter.convert()
+        # Write then rename: other workers never read a partial file, and a crash leaves no corrupt export behind
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(content)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def _interpreter(self):
+        interpreter = getattr(self._local, "interpreter", None)
+        if interpreter is None:
+            import tensorflow as tf
+
+            interpreter = tf.lite.Interpreter(model_content=self._tflite)
+            interpreter.allocate_tensors()
+            self._local.interpreter = interpreter
+        return interpreter
+
+    def _predict_tflite(self, inputs: list[str]) -> list[float]:
+        import tensorflow as tf
+
+        tokens = self._vectorize(tf.constant(inputs)).numpy()
+        interpreter = self._interpreter()
+        in_detail = interpreter.get_input_details()[0]
+        if tuple(in_detail["shape"]) != tokens.shape:
+            # Batch dimension is dynamic in the exported signature; rows are quantized independently
+            interpreter.resize_tensor_input(in_detail["index"], tokens.shape)
+            interpreter.allocate_tensors()
+            in_detail = interpreter.get_input_details()[0]
+        out_detail = interpreter.get_output_details()[0]
+        interpreter.set_tensor(in_detail["index"], tokens.astype(in_detail["dtype"]))
+        interpreter.invoke()
+        values = interpreter.get_tensor(out_detail["index"])[:, 0]
+        scale, zero_point = out_detail["quantization"]
+        return [(float(v) - zero_point) * scale if scale else float(v) for v in values]
+
+    def _load_or_train(self):
         try:
             import tensorflow as tf  # noqa: F401
             from tensorflow import keras
@@ -51,8 +241,7 @@ class TFFaithfulnessScorer(FaithfulnessScorer):
 
         path = self.model_path
         if path and os.path.isfile(path):
-            self._model = keras.models.load_model(path)
-            return self._model
+            return keras.models.load_model(path)
 
         texts, labels = self._synthetic_data()
         if not texts:
@@ -60,7 +249,7 @@ class TFFaithfulnessScorer(FaithfulnessScorer):
 
         self._vectorize = keras.layers.TextVectorization(
             max_tokens=self._VOCAB_SIZE,
-            output_sequence_length=128,
+            output_sequence_length=self._SEQ_LEN,
             output_mode="int",
         )
         self._vectorize.adapt(texts)
@@ -82,10 +271,9 @@ class TFFaithfulnessScorer(FaithfulnessScorer):
             epochs=self._EPOCHS,
             verbose=0,
         )
-        self._model = model
         os.makedirs(os.path.dirname(path), exist_ok=True)
         model.save(path)
-        return self._model
+        return model
 
     def _synthetic_data(self) -> tuple[list[str], list[float]]:
         """Synthetic (response, context) pairs: faithful (1) vs unfaithful (0)."""
@@ -134,6 +322,43 @@ class TFFaithfulnessScorer(FaithfulnessScorer):
         c = (context or "").strip()[:500]
         return f"[RESPONSE] {r} [CONTEXT] {c}"
 
+    def _predict_many(self, inputs: list[str]) -> list[float]:
+        """One backend call for all inputs: int8 TFLite when loaded, else the Keras forward pass."""
+        if self._tflite is not None:
+            return self._predict_tflite(inputs)
+
+        import tensorflow as tf
+
+        return [float(p) for p in self._predict(tf.constant([[i] for i in inputs])).numpy()[:, 0]]
+
+    def _score_inputs(self, inputs: list[str]) -> list[float]:
+        """Cached scores for formatted inputs; the distinct misses go through a single _predict_many call."""
+        scores: dict[str, float] = {}
+        with self._cache_lock:
+            for inp in inputs:
+                if inp in self._cache:
+                    self._cache.move_to_end(inp)
+                    scores[inp] = self._cache[inp]
+        missing = [inp for inp in dict.fromkeys(inputs) if inp not in scores]
+        if missing:
+            scores.update(zip(missing, self._predict_many(missing)))
+            with self._cache_lock:
+                for inp in missing:
+                    self._cache[inp] = scores[inp]
+                while len(self._cache) > self._CACHE_SIZE:
+                    self._cache.popitem(last=False)
+        return [scores[inp] for inp in inputs]
+
+    def warmup(self) -> None:
+        """
+        Load the model and run inference once for a single input and once for an uncached batch, so the model load,
+        the first tf.function trace (or TFLite interpreter allocation) happen at startup rather than on the first request.
+        The batch dimension is unconstrained in the input signature: one trace serves every batch size.
+        """
+        pairs = [("warmup response", "warmup context"), ("warmup reply", "warmup document"), ("warmup answer", "warmup source")]
+        self.score(*pairs[0])
+        self.score_batch(pairs[1:])
+
     def score(self, response: str, context: str) -> float:
         try:
             model = self._get_model()
@@ -141,9 +366,14 @@ class TFFaithfulnessScorer(FaithfulnessScorer):
             return self._fallback.score(response, context)
         if model is None:
             return self._fallback.score(response, context)
+        return self._score_inputs([self._format_input(response, context)])[0]
 
-        import tensorflow as tf
-
-        inp = self._format_input(response, context)
-        pred = model.predict(tf.constant([inp]), verbose=0)[0][0]
-        return float(pred)
+    def score_batch(self, pairs: list[tuple[str, str]]) -> list[float]:
+        """One forward pass for all pairs not already cached; same backend (and scores) as score()."""
+        try:
+            model = self._get_model()
+        except Exception:
+            model = None
+        if model is None:
+            return self._fallback.score_batch(pairs)
+        return self._score_inputs([self._format_input(r, c) for r, c in pairs])
@@ -1,8 +1,22 @@
 """RAG over conversation history for issue handling. Production: Weaviate index of past turns."""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Any, Optional
 
-from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.messages import BaseMessage
+
+
+# Chars per token for budget estimates (English chat text averages ~3-4; 3 errs on the safe side)
+_CHARS_PER_TOKEN = 3
+# Identifiers (INV-123, order numbers, emails) carry the issue state; weight them in the summary
+_KEYWORD_RE = re.compile(r"\b(?:[A-Za-z]+-?\d+[\w-]*|\d{3,}|[\w.+-]+@[\w-]+\.[\w.]+)\b")
+# Max chars kept from one older turn inside the summary
+_SUMMARY_TURN_CHARS = 200
+# Line prefix per role (history lines are "User: ..." / "Agent: ...")
+_PREFIX = {"user": "User: ", "assistant": "Agent: "}
 
 
 @dataclass
@@ -19,8 +33,13 @@ class ConversationHistoryRAG:
     Simple: returns last N turns. Production: embed turns, store in Weaviate, retrieve similar.
     """
 
-    def __init__(self, max_turns: int = 10) -> None:
+    def __init__(self, max_turns: int = 10, keep_recent: int = 4, summary_cache_size: int = 1024) -> None:
         self.max_turns = max_turns
+        self.keep_recent = keep_recent
+        self.summary_cache_size = summary_cache_size
+        # session_id -> (digest of the summarised turns, summary); older turns rarely change, so reuse the summary
+        self._summary_cache: "OrderedDict[str, tuple[str, str]]" = OrderedDict()
+        self._summary_lock = threading.Lock()
 
     def retrieve(
         self,
@@ -38,17 +57,125 @@ class ConversationHistoryRAG:
             content = getattr(m, "content", None)
             if not content:
                 continue
-            role = "user" if isinstance(m, HumanMessage) else "assistant"
+            # .type is a plain attribute on LangChain messages; cheaper than an isinstance walk per turn
+            role = "user" if getattr(m, "type", "") == "human" else "assistant"
             chunks.append(HistoryChunk(content=str(content), role=role, turn_index=i))
         return chunks
 
     def format_for_context(self, messages: list[BaseMessage], max_turns: int = 10) -> str:
         """Format conversation history for inclusion in agent prompt."""
-        chunks = self.retrieve(messages, "", top_k=max_turns)
-        if not chunks:
-            return "(No previous conversation)"
+        # Lines straight from the messages: no intermediate HistoryChunk list on the per-turn prompt path
         lines = []
-        for c in chunks:
-            prefix = "User:" if c.role == "user" else "Agent:"
-            lines.append(f"{prefix} {c.content}")
+        for m in messages[-(max_turns or self.max_turns):]:
+            content = getattr(m, "content", None)
+            if not content:
+                continue
+            lines.append(_PREFIX["user" if getattr(m, "type", "") == "human" else "assistant"] + str(content))
+        if not lines:
+            return "(No previous conversation)"
         return "\n".join(lines)
+
+    def compress(
+        self,
+        messages: list[BaseMessage],
+        token_budget: int,
+        session_id: Optional[str] = None,
+    ) -> str:
+        """
+        Format history within ~token_budget tokens: last keep_recent turns verbatim plus an extractive
+        summary of older turns (scored by role, recency and identifier density). Falls back to
+        format_for_context when the budget is 0 or the whole history already fits.
+        """
+        if token_budget <= 0:
+            return self.format_for_context(messages, max_turns=self.max_turns)
+        chunks = self.retrieve(messages, "", top_k=len(messages))
+        if not chunks:
+            return "(No previous conversation)"
+        char_budget = token_budget * _CHARS_PER_TOKEN
+        lines = [self._format_line(c.role, c.content) for c in chunks]
+        if sum(len(line) + 1 for line in lines) <= char_budget:
+            return "\n".join(lines)
+
+        # Recent turns verbatim (newest first until the budget is spent; the last turn is always kept, truncated if needed)
+        recent: list[str] = []
+        used = 0
+        for line in reversed(lines[-self.keep_recent:]):
+            if recent and used + len(line) + 1 > char_budget:
+                break
+            recent.insert(0, line[-char_budget:])
+            used += len(recent[0]) + 1
+        older = chunks[: len(chunks) - len(recent)]
+        if not older:
+            return "\n".join(recent)
+        summary = self._summarize(older, char_budget - used, session_id)
+        return "\n".join(([summary] if summary else []) + recent)
+
+    async def acompress(
+        self,
+        messages: list[BaseMessage],
+        token_budget: int,
+        session_id: Optional[str] = None,
+    ) -> str:
+        """Async compress. In-memory scoring, so this runs inline."""
+        return self.compress(messages, token_budget, session_id=session_id)
+
+    def _summarize(
+        self,
+        chunks: list[HistoryChunk],
+        char_budget: int,
+        session_id: Optional[str],
+    ) -> str:
+        header = "Summary of earlier conversation:"
+        if char_budget <= len(header) + 1:
+            return ""
+        digest = None
+        if session_id:
+            # Keyed on the summarised turns only: the budget left over by the recent turns varies from call to call,
+            # and a cached summary is reused whenever it still fits
+            h = hashlib.sha1()
+            for c in chunks:
+                h.update(f"{c.role}\0{c.content}\0".encode("utf-8", "ignore"))
+            digest = h.hexdigest()
+            with self._summary_lock:
+                cached = self._summary_cache.get(session_id)
+                if cached is not None and cached[0] == digest and len(cached[1]) < char_budget:
+                    self._summary_cache.move_to_end(session_id)
+                    return cached[1]
+
+        n = len(chunks)
+        scored = []
+        for i, c in enumerate(chunks):
+            words = max(1, len(c.content.split()))
+            density = len(_KEYWORD_RE.findall(c.content)) / words
+            role_weight = 1.0 if c.role == "user" else 0.6
+            scored.append((role_weight + (i + 1) / n + 2.0 * density, i))
+        picked: list[int] = []
+        remaining = char_budget - len(header) - 1
+        for _, i in sorted(scored, reverse=True):
+            line = "- " + self._format_line(chunks[i].role, self._clip(chunks[i].content))
+            if len(line) + 1 > remaining:
+                continue
+            picked.append(i)
+            remaining -= len(line) + 1
+        if not picked:
+            return ""
+        summary = "\n".join(
+            [header] + ["- " + self._format_line(chunks[i].role, self._clip(chunks[i].content)) for i in sorted(picked)]
+        )
+
+        if digest is not None:
+            with self._summary_lock:
+                self._summary_cache[session_id] = (digest, summary)
+                self._summary_cache.move_to_end(session_id)
+                while len(self._summary_cache) > self.summary_cache_size:
+                    self._summary_cache.popitem(last=False)
+        return summary
+
+    @staticmethod
+    def _format_line(role: str, content: str) -> str:
+        return _PREFIX.get(role, "Agent: ") + content
+
+    @staticmethod
+    def _clip(text: str) -> str:
+        text = " ".join(text.split())
+        return text if len(text) <= _SUMMARY_TURN_CHARS else text[: _SUMMARY_TURN_CHARS - 3] + "..."
@@ -0,0 +1,67 @@
+"""Shared outbound HTTP clients (LLM inference, MCP): one keep-alive pool per process, HTTP/2 when h2 is installed."""
+import functools
+from typing import Optional
+
+import httpx
+
+from ..config import config
+
+
+@functools.lru_cache(maxsize=1)
+def _http2() -> bool:
+    if not config.http2_enabled:
+        return False
+    try:
+        import h2  # noqa: F401  (httpx[http2] extra)
+    except ImportError:
+        return False
+    return True
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=config.llm_max_connections,
+        max_keepalive_connections=config.llm_max_keepalive_connections,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    # Long reads (generation), short connects: a dead endpoint fails in seconds instead of holding a slot
+    return httpx.Timeout(config.agent_invocation_timeout_seconds, connect=config.llm_connect_timeout_seconds)
+
+
+@functools.lru_cache(maxsize=1)
+def get_http_client() -> httpx.Client:
+    """Process-wide sync client (sync LLM calls, worker threads)."""
+    return httpx.Client(http2=_http2(), limits=_limits(), timeout=_timeout())
+
+
+@functools.lru_cache(maxsize=1)
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Process-wide async client: concurrent requests multiplex over HTTP/2 or reuse keep-alive connections.
+    The pool is sized so N concurrent ainvoke calls stay N in-flight requests (self-hosted servers batch them continuously).
+    """
+    return httpx.AsyncClient(http2=_http2(), limits=_limits(), timeout=_timeout())
+
+
+def mcp_http_client_factory(
+    headers: Optional[dict[str, str]] = None,
+    timeout: Optional[httpx.Timeout] = None,
+    auth: Optional[httpx.Auth] = None,
+) -> httpx.AsyncClient:
+    """httpx_client_factory for MCP transports: same pool limits / HTTP/2. The transport owns and closes the client."""
+    if timeout is None:
+        # MCP defaults: short connect/write, long read for server-held streams
+        timeout = httpx.Timeout(30.0, read=300.0)
+    return httpx.AsyncClient(http2=_http2(), limits=_limits(), headers=headers, timeout=timeout, auth=auth)
+
+
+async def aclose_http_clients() -> None:
+    """Close the shared clients (app shutdown)."""
+    if get_async_http_client.cache_info().currsize:
+        await get_async_http_client().aclose()
+        get_async_http_client.cache_clear()
+    if get_http_client.cache_info().currsize:
+        get_http_client().close()
+        get_http_client.cache_clear()
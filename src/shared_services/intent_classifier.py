@@ -2,9 +2,15 @@
 from __future__ import annotations
 
 import os
+import threading
 from abc import ABC, abstractmethod
 from pathlib import Path
 
+try:
+    import ahocorasick as _ac  # pyahocorasick
+except ImportError:  # per-keyword substring checks
+    _ac = None
+
 # Intent labels in fixed order (support = default index 0)
 INTENT_LABELS: list[str] = ["support", "billing", "tech", "escalation"]
 
@@ -15,6 +21,9 @@ INTENT_MAP: list[tuple[tuple[str, ...], str]] = [
     (("human", "agent", "escalate", "speak to someone"), "escalation"),
 ]
 
+# Flat keyword -> agent_id, in INTENT_MAP order (so first hits keep router precedence)
+_FLAT_INTENT: dict[str, str] = {kw: agent_id for keywords, agent_id in INTENT_MAP for kw in keywords}
+
 
 class IntentClassifier(ABC):
     """Interface for intent classification. Returns suggested agent pool IDs."""
@@ -28,15 +37,32 @@ class IntentClassifier(ABC):
 class KeywordIntentClassifier(IntentClassifier):
     """Keyword-based intent (current stub behavior). No TensorFlow."""
 
-    def classify(self, message: str) -> list[str]:
+    def __init__(self) -> None:
+        # With pyahocorasick: one automaton over all keywords (keyword -> (INTENT_MAP index, keyword)), one pass per message
+        self._automaton = None
+        if _ac is not None:
+            self._automaton = _ac.Automaton()
+            for i, (keywords, _) in enumerate(INTENT_MAP):
+                for kw in keywords:
+                    self._automaton.add_word(kw, (i, kw))
+            self._automaton.make_automaton()
+
+    def keyword_hits(self, message: str) -> dict[str, int]:
+        """agent_id -> number of distinct keywords found in the message, in INTENT_MAP order."""
         msg_lower = message.lower()
-        suggested: list[str] = []
-        for keywords, agent_id in INTENT_MAP:
-            if any(kw in msg_lower for kw in keywords):
-                suggested.append(agent_id)
-        if not suggested:
-            suggested = ["support"]
-        return suggested
+        if self._automaton is not None:
+            found: dict[int, set[str]] = {}
+            for _, (i, kw) in self._automaton.iter(msg_lower):
+                found.setdefault(i, set()).add(kw)
+            return {INTENT_MAP[i][1]: len(kws) for i, kws in sorted(found.items())}
+        hits: dict[str, int] = {}
+        for kw, agent_id in _FLAT_INTENT.items():
+            if kw in msg_lower:
+                hits[agent_id] = hits.get(agent_id, 0) + 1
+        return hits
+
+    def classify(self, message: str) -> list[str]:
+        return list(self.keyword_hits(message)) or ["support"]
 
 
 class TFIntentClassifier(IntentClassifier):
@@ -56,11 +82,23 @@ class TFIntentClassifier(IntentClassifier):
         self.model_path = model_path or str(self._DEFAULT_MODEL_DIR / "model.keras")
         self._model = None
         self._vectorize = None
+        self._predict = None
         self._fallback = KeywordIntentClassifier()
+        self._lock = threading.Lock()
 
     def _get_model(self):
+        # Double-checked: concurrent first calls load/train the model once, later calls take no lock
         if self._model is not None:
             return self._model
+        with self._lock:
+            if self._model is None:
+                model = self._load_or_train()
+                if model is not None:
+                    self._predict = self._compile_predict(model)
+                self._model = model
+        return self._model
+
+    def _load_or_train(self):
         try:
             import tensorflow as tf  # noqa: F401
             from tensorflow import keras
@@ -69,8 +107,7 @@ class TFIntentClassifier(IntentClassifier):
 
         path = self.model_path
         if path and os.path.isfile(path):
-            self._model = keras.models.load_model(path)
-            return self._model
+            return keras.models.load_model(path)
 
         # Build and train from synthetic data
         texts, labels = self._synthetic_data()
@@ -110,10 +147,20 @@ class TFIntentClassifier(IntentClassifier):
             verbose=0,
         )
 
-        self._model = model
         os.makedirs(os.path.dirname(path), exist_ok=True)
         model.save(path)
-        return self._model
+        return model
+
+    @staticmethod
+    def _compile_predict(model):
+        """Graph-compiled forward pass for a [N, 1] string batch (no per-call model.predict() setup)."""
+        import tensorflow as tf
+
+        @tf.function(input_signature=[tf.TensorSpec([None, 1], tf.string)])
+        def predict(inputs):
+            return model(inputs, training=False)
+
+        return predict
 
     def _synthetic_data(self) -> tuple[list[str], list[str]]:
         """Generate synthetic (text, intent) from INTENT_MAP for training."""
@@ -135,7 +182,13 @@ class TFIntentClassifier(IntentClassifier):
         labels.append("support")
         return texts, labels
 
+    # Keyword prefilter: a single intent backed by at least this many distinct keywords skips the model
+    _KEYWORD_SHORTCUT_HITS = 2
+
     def classify(self, message: str) -> list[str]:
+        hits = self._fallback.keyword_hits(message)
+        if len(hits) == 1 and next(iter(hits.values())) >= self._KEYWORD_SHORTCUT_HITS:
+            return list(hits)
         try:
             model = self._get_model()
         except Exception:
@@ -146,7 +199,7 @@ class TFIntentClassifier(IntentClassifier):
         import tensorflow as tf
 
         msg = message.strip() or "help"
-        pred = model.predict(tf.constant([msg]), verbose=0)[0]
+        pred = self._predict(tf.constant([[msg]])).numpy()[0]
         idx = int(pred.argmax())
         confidence = float(pred[idx])
         # Return single best intent; if low confidence, default support
@@ -1,9 +1,29 @@
 """RAG service interface and implementations. Production uses Weaviate."""
+import asyncio
+import queue
+import re
+import threading
 from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Optional
 
 
+# Messages made only of these words are small talk ("thanks!", "ok bye", "hi there"): nothing to retrieve
+_SMALLTALK_WORDS = frozenset({
+    "hi", "hello", "hey", "there", "thanks", "thank", "you", "thx", "ty", "ok", "okay", "k", "bye", "goodbye",
+    "cool", "great", "nice", "perfect", "awesome", "sure", "yes", "yep", "no", "nope", "got", "it", "good",
+    "morning", "afternoon", "evening", "night", "cheers", "np", "fine", "alright", "much", "so",
+})
+_WORD_RE = re.compile(r"[a-z']+")
+
+
+def needs_retrieval(query: str) -> bool:
+    """False for pure small talk, where document retrieval (embedding + vector search) adds nothing to the answer."""
+    words = _WORD_RE.findall(query.lower())
+    return not words or not all(w in _SMALLTALK_WORDS for w in words)
+
+
 @dataclass
 class RAGChunk:
     """A retrieved document chunk."""
@@ -20,6 +40,14 @@ class RAGService(ABC):
         """Retrieve relevant chunks for a query."""
         pass
 
+    def retrieve_batch(self, queries: list[str], top_k: int = 5, filters: Optional[dict] = None) -> list[list[RAGChunk]]:
+        """Retrieve chunks for several queries. Default: one retrieve per query; override when the backend can batch."""
+        return [self.retrieve(q, top_k=top_k, filters=filters) for q in queries]
+
+    async def aretrieve(self, query: str, top_k: int = 5, filters: Optional[dict] = None) -> list[RAGChunk]:
+        """Async retrieve. Default runs retrieve in a worker thread; override for a native async client."""
+        return await asyncio.to_thread(self.retrieve, query, top_k, filters)
+
 
 class StubRAGService(RAGService):
     """Stub: returns fake chunks. Use WeaviateRAGService in production with Weaviate."""
@@ -33,6 +61,9 @@ class StubRAGService(RAGService):
             ),
         ][:top_k]
 
+    async def aretrieve(self, query: str, top_k: int = 5, filters: Optional[dict] = None) -> list[RAGChunk]:
+        return self.retrieve(query, top_k=top_k, filters=filters)
+
 
 class WeaviateRAGService(RAGService):
     """
@@ -40,13 +71,22 @@ class WeaviateRAGService(RAGService):
     Set WEAVIATE_URL (e.g. http://localhost:8080) and optionally WEAVIATE_INDEX.
     """
 
+    _BATCH_WORKERS = 8
+
     def __init__(self, url: str, index_name: str = "RAGChunks") -> None:
         self.url = url
         self.index_name = index_name
         self._client = None
+        self._client_lock = threading.Lock()
+        self._pool: ThreadPoolExecutor | None = None
 
     def _get_client(self):
-        if self._client is None:
+        # Double-checked: concurrent first retrieves build one client (one gRPC channel), later calls take no lock
+        if self._client is not None:
+            return self._client
+        with self._client_lock:
+            if self._client is not None:
+                return self._client
             try:
                 import weaviate
                 from urllib.parse import urlparse
@@ -66,7 +106,7 @@ class WeaviateRAGService(RAGService):
                 raise RuntimeError("Weaviate required. Install: pip install weaviate-client") from e
             except Exception as e:
                 raise RuntimeError(f"Weaviate connection failed: {e}") from e
-        return self._client
+            return self._client
 
     def retrieve(self, query: str, top_k: int = 5, filters: Optional[dict] = None) -> list[RAGChunk]:
         """Query Weaviate for relevant chunks (near_text semantic search)."""
@@ -83,3 +123,94 @@ class WeaviateRAGService(RAGService):
             return chunks if chunks else [RAGChunk(content=f"No Weaviate results for: {query[:50]}...", source=None, score=0.0)]
         except Exception as e:
             return [RAGChunk(content=f"Weaviate retrieval error: {e}", source=None, score=0.0)]
+
+    def retrieve_batch(self, queries: list[str], top_k: int = 5, filters: Optional[dict] = None) -> list[list[RAGChunk]]:
+        """
+        The v4 client has no multi-query near_text, so run the searches concurrently on the shared client
+        (one gRPC channel multiplexes them): a batch takes about as long as its slowest query, not the sum.
+        """
+        if len(queries) <= 1:
+            return super().retrieve_batch(queries, top_k=top_k, filters=filters)
+        self._get_client()  # connect once here, not in a race between pool threads
+        if self._pool is None:
+            with self._client_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self._BATCH_WORKERS, thread_name_prefix="weaviate")
+        return list(self._pool.map(lambda q: self.retrieve(q, top_k=top_k, filters=filters), queries))
+
+
+class BatchingRetriever(RAGService):
+    """
+    Wraps a RAGService and coalesces concurrent retrieve() calls into retrieve_batch().
+    Callers block on a future; a background thread drains up to batch_size queries or
+    waits at most max_wait_ms before dispatching, so N concurrent turns cost ceil(N/batch_size) backend calls.
+    """
+
+    def __init__(self, rag: RAGService, batch_size: int = 16, max_wait_ms: float = 50.0) -> None:
+        self.rag = rag
+        self.batch_size = max(1, batch_size)
+        self.max_wait_seconds = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue[tuple[str, int, Optional[dict], Future]]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="rag-batcher", daemon=True)
+        self._worker.start()
+
+    def retrieve(self, query: str, top_k: int = 5, filters: Optional[dict] = None) -> list[RAGChunk]:
+        fut: Future = Future()
+        self._queue.put((query, top_k, filters, fut))
+        return fut.result()
+
+    async def aretrieve(self, query: str, top_k: int = 5, filters: Optional[dict] = None) -> list[RAGChunk]:
+        # Await the batch future directly: no worker thread parked per caller
+        fut: Future = Future()
+        self._queue.put((query, top_k, filters, fut))
+        return await asyncio.wrap_future(fut)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get(timeout=self.max_wait_seconds))
+            except queue.Empty:
+                pass
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: list[tuple[str, int, Optional[dict], Future]]) -> None:
+        # One backend call per distinct (top_k, filters); filters are rarely set, so usually a single group
+        groups: dict[tuple[int, str], list[tuple[str, int, Optional[dict], Future]]] = {}
+        for item in batch:
+            # Skip callers that were cancelled while queued (e.g. a request short-circuited by a guardrail)
+            if not item[3].set_running_or_notify_cancel():
+                continue
+            groups.setdefault((item[1], repr(item[2])), []).append(item)
+        for items in groups.values():
+            top_k, filters = items[0][1], items[0][2]
+            try:
+                results = self.rag.retrieve_batch([q for q, _, _, _ in items], top_k=top_k, filters=filters)
+                if len(results) != len(items):
+                    raise RuntimeError(f"retrieve_batch returned {len(results)} results for {len(items)} queries")
+            except Exception as e:
+                for _, _, _, fut in items:
+                    fut.set_exception(e)
+                continue
+            for (_, _, _, fut), chunks in zip(items, results):
+                fut.set_result(chunks)
+
+
+# One BatchingRetriever (and worker thread) per wrapped service for the life of the process.
+# Holding the rag object keeps its id() from being reused while the entry exists.
+_BATCHING_RETRIEVERS: dict[int, tuple[RAGService, BatchingRetriever]] = {}
+_batching_retrievers_lock = threading.Lock()
+
+
+def get_batching_retriever(rag: RAGService, batch_size: int = 16, max_wait_ms: float = 50.0) -> BatchingRetriever:
+    """Shared BatchingRetriever for rag; the batch settings only apply when it is first created."""
+    if isinstance(rag, BatchingRetriever):
+        return rag
+    with _batching_retrievers_lock:
+        hit = _BATCHING_RETRIEVERS.get(id(rag))
+        if hit is not None and hit[0] is rag:
+            return hit[1]
+        retriever = BatchingRetriever(rag, batch_size=batch_size, max_wait_ms=max_wait_ms)
+        _BATCHING_RETRIEVERS[id(rag)] = (rag, retriever)
+        return retriever
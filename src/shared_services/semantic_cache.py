@@ -0,0 +1,169 @@
+"""Semantic LLM-response cache: embed the prompt, LSH lookup, return a cached answer when cosine similarity is high enough."""
+import math
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+try:
+    import numpy as _np
+except ImportError:  # pure-Python fallback; numpy only speeds up projection / dot products
+    _np = None
+
+from ..config import config
+
+
+class SemanticCache(ABC):
+    """Interface for a semantic response cache. Namespaces keep agent pools (support / billing) apart."""
+
+    @abstractmethod
+    def lookup(self, namespace: str, text: str) -> Optional[str]:
+        """Return cached response content for a semantically equivalent prompt, or None."""
+        pass
+
+    @abstractmethod
+    def store(self, namespace: str, text: str, content: str) -> None:
+        """Cache response content for this prompt."""
+        pass
+
+
+@dataclass
+class _Entry:
+    namespace: str
+    vector: Any  # unit-normalised embedding (numpy array or list[float])
+    content: str
+    expires_at: float
+    buckets: list[tuple[int, str, int]]
+
+
+class LSHSemanticCache(SemanticCache):
+    """
+    In-memory semantic cache with random-projection LSH (num_tables × num_bits hyperplanes).
+    Candidates sharing any bucket are re-ranked by exact cosine similarity; a hit needs >= threshold.
+    embed_fn: text -> list[float]. Entries expire after ttl_seconds; oldest evicted beyond max_entries.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[str], list[float]],
+        threshold: float = 0.95,
+        num_tables: int = 8,
+        num_bits: int = 16,
+        ttl_seconds: float = 3600.0,
+        max_entries: int = 10000,
+        seed: int = 0,
+    ) -> None:
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self.num_tables = num_tables
+        self.num_bits = num_bits
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._rng = random.Random(seed)
+        self._planes: Any = None  # built on first embedding, once the dimension is known
+        self._tables: dict[tuple[int, str, int], list[int]] = {}
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        # lookup() then store() for the same prompt: reuse the embedding instead of a second API call
+        self._recent_vectors: "OrderedDict[str, Any]" = OrderedDict()
+
+    def lookup(self, namespace: str, text: str) -> Optional[str]:
+        vec = self._vector(text)
+        now = time.monotonic()
+        with self._lock:
+            best_id, best_sim = None, self.threshold
+            for key in self._bucket_keys(namespace, vec):
+                for eid in self._tables.get(key, ()):
+                    entry = self._entries.get(eid)
+                    if entry is None or entry.expires_at <= now:
+                        continue
+                    sim = self._dot(vec, entry.vector)
+                    if sim >= best_sim:
+                        best_id, best_sim = eid, sim
+            return self._entries[best_id].content if best_id is not None else None
+
+    def store(self, namespace: str, text: str, content: str) -> None:
+        vec = self._vector(text)
+        with self._lock:
+            buckets = self._bucket_keys(namespace, vec)
+            eid = self._next_id
+            self._next_id += 1
+            self._entries[eid] = _Entry(namespace, vec, content, time.monotonic() + self.ttl_seconds, buckets)
+            for key in buckets:
+                self._tables.setdefault(key, []).append(eid)
+            while len(self._entries) > self.max_entries:
+                self._evict(next(iter(self._entries)))
+
+    def _vector(self, text: str) -> Any:
+        with self._lock:
+            vec = self._recent_vectors.get(text)
+        if vec is not None:
+            return vec
+        raw = self.embed_fn(text)
+        norm = math.sqrt(sum(x * x for x in raw)) or 1.0
+        vec = _np.asarray(raw, dtype=_np.float32) / norm if _np is not None else [x / norm for x in raw]
+        with self._lock:
+            self._recent_vectors[text] = vec
+            if len(self._recent_vectors) > 256:
+                self._recent_vectors.popitem(last=False)
+        return vec
+
+    def _bucket_keys(self, namespace: str, vec: Any) -> list[tuple[int, str, int]]:
+        # Caller holds self._lock
+        if self._planes is None:
+            n = self.num_tables * self.num_bits
+            planes = [[self._rng.gauss(0.0, 1.0) for _ in range(len(vec))] for _ in range(n)]
+            self._planes = _np.asarray(planes, dtype=_np.float32) if _np is not None else planes
+        if _np is not None:
+            bits = (self._planes @ vec > 0).tolist()
+        else:
+            bits = [self._dot(plane, vec) > 0 for plane in self._planes]
+        keys = []
+        for t in range(self.num_tables):
+            code = 0
+            for b in bits[t * self.num_bits:(t + 1) * self.num_bits]:
+                code = (code << 1) | int(b)
+            keys.append((t, namespace, code))
+        return keys
+
+    def _evict(self, eid: int) -> None:
+        entry = self._entries.pop(eid)
+        for key in entry.buckets:
+            ids = self._tables.get(key)
+            if ids is None:
+                continue
+            ids.remove(eid)
+            if not ids:
+                del self._tables[key]
+
+    @staticmethod
+    def _dot(a: Any, b: Any) -> float:
+        if _np is not None and not isinstance(a, list):
+            return float(_np.dot(a, b))
+        return sum(x * y for x, y in zip(a, b))
+
+
+_semantic_cache: Optional[SemanticCache] = None
+_semantic_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """Process-wide cache shared by all agents (namespaced per pool). None unless SEMANTIC_CACHE_ENABLED."""
+    global _semantic_cache
+    if not config.semantic_cache_enabled:
+        return None
+    with _semantic_cache_lock:
+        if _semantic_cache is None:
+            from langchain_openai import OpenAIEmbeddings
+            embeddings = OpenAIEmbeddings(model=config.semantic_cache_embedding_model)
+            _semantic_cache = LSHSemanticCache(
+                embed_fn=embeddings.embed_query,
+                threshold=config.semantic_cache_threshold,
+                ttl_seconds=config.semantic_cache_ttl_seconds,
+                max_entries=config.semantic_cache_max_entries,
+            )
+        return _semantic_cache
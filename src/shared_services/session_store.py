@@ -1,5 +1,8 @@
 """Session store interface for LangGraph checkpointer state. Production: Redis."""
+import threading
+import time
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from typing import Any, Optional
 
 
@@ -18,13 +21,36 @@ class SessionStore(ABC):
 
 
 class InMemorySessionStore(SessionStore):
-    """In-memory stub. Replace with Redis in production."""
-
-    def __init__(self) -> None:
-        self._store: dict[str, Any] = {}
+    """
+    In-memory stub. Replace with Redis in production.
+    Honors ttl_seconds (expired sessions are dropped on read and swept on write) and keeps at most
+    max_sessions sessions (least recently written evicted), so abandoned sessions don't accumulate.
+    """
+
+    def __init__(self, max_sessions: int = 100_000) -> None:
+        self.max_sessions = max_sessions
+        # session_id -> (expires_at monotonic, state), least recently written first
+        self._store: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
 
     def get(self, session_id: str) -> Optional[Any]:
-        return self._store.get(session_id)
+        with self._lock:
+            entry = self._store.get(session_id)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._store[session_id]
+                return None
+            return entry[1]
 
     def set(self, session_id: str, state: Any, ttl_seconds: int = 86400) -> None:
-        self._store[session_id] = state
+        now = time.monotonic()
+        with self._lock:
+            self._store[session_id] = (now + ttl_seconds, state)
+            self._store.move_to_end(session_id)
+            # Sweep expired entries from the old end (stops at the first live one), then cap the size
+            while self._store:
+                oldest = next(iter(self._store.values()))
+                if oldest[0] > now and len(self._store) <= self.max_sessions:
+                    break
+                self._store.popitem(last=False)
@@ -1,8 +1,13 @@
 """Supervisor LangGraph graph: (optional) plan → route → invoke_agent → aggregate → (optional) escalate."""
+import asyncio
+import functools
 import re
+import threading
+from collections import OrderedDict
 from typing import Annotated, Any, Literal, Optional, TypedDict
 
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import END, StateGraph
 from langgraph.graph.message import add_messages
 from langgraph.checkpoint.memory import MemorySaver
@@ -10,40 +15,119 @@ from langgraph.checkpoint.memory import MemorySaver
 from .config import config
 from .inference import get_llm_backend
 
+# Planner reply parsing (compiled once, used on every planned turn)
+_PLANNER_CHOICE_RE = re.compile(r"\b(support|billing)\b")
 
-def _make_checkpointer(use_checkpointer: bool):
-    """Return Redis checkpointer if REDIS_URL is set, else in-memory or None."""
+
+class LRUMemorySaver(MemorySaver):
+    """
+    MemorySaver bounded to the max_threads most recently used threads (sessions). Reads and writes mark a thread
+    as used; writing a new thread past the cap drops the least recently used one with its writes and blobs.
+    """
+
+    def __init__(self, max_threads: int = 10000) -> None:
+        super().__init__()
+        self.max_threads = max_threads
+        # thread_id -> keys it owns in self.writes / self.blobs, so eviction doesn't scan every thread's keys
+        self._threads: "OrderedDict[str, set[tuple]]" = OrderedDict()
+        self._lru_lock = threading.Lock()
+
+    def _touch(self, thread_id: str, keys: tuple = ()) -> None:
+        with self._lru_lock:
+            owned = self._threads.get(thread_id)
+            if owned is None:
+                owned = self._threads[thread_id] = set()
+                while len(self._threads) > self.max_threads:
+                    self._evict(*self._threads.popitem(last=False))
+            else:
+                self._threads.move_to_end(thread_id)
+            owned.update(keys)
+
+    def _evict(self, thread_id: str, keys: set[tuple]) -> None:
+        self.storage.pop(thread_id, None)
+        for k in keys:
+            self.writes.pop(k, None)
+            self.blobs.pop(k, None)
+
+    def get_tuple(self, config: Any) -> Any:
+        thread_id = config["configurable"]["thread_id"]
+        out = super().get_tuple(config)
+        # MemorySaver reads index its defaultdicts: record the writes key it touched, drop the entry made for unknown threads
+        with self._lru_lock:
+            owned = self._threads.get(thread_id)
+            if owned is None:
+                if not self.storage.get(thread_id):
+                    self.storage.pop(thread_id, None)
+                return out
+            self._threads.move_to_end(thread_id)
+            if out is not None:
+                conf = out.config["configurable"]
+                owned.add((thread_id, conf.get("checkpoint_ns", ""), conf["checkpoint_id"]))
+        return out
+
+    def put(self, config: Any, checkpoint: Any, metadata: Any, new_versions: Any) -> Any:
+        out = super().put(config, checkpoint, metadata, new_versions)
+        conf = config["configurable"]
+        thread_id, ns = conf["thread_id"], conf.get("checkpoint_ns", "")
+        self._touch(thread_id, tuple((thread_id, ns, k, v) for k, v in new_versions.items()))
+        return out
+
+    def put_writes(self, config: Any, writes: Any, task_id: str, task_path: str = "") -> None:
+        super().put_writes(config, writes, task_id, task_path)
+        conf = config["configurable"]
+        self._touch(conf["thread_id"], ((conf["thread_id"], conf.get("checkpoint_ns", ""), conf["checkpoint_id"]),))
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lru_lock:
+            keys = self._threads.pop(thread_id, None)
+        if keys is not None:
+            self._evict(thread_id, keys)
+        else:
+            super().delete_thread(thread_id)
+
+
+@functools.lru_cache(maxsize=4)
+def _make_checkpointer(use_checkpointer: bool, async_mode: bool = False):
+    """Return Redis checkpointer if REDIS_URL is set, else bounded in-memory or None. One instance per mode per process.
+    async_mode: return AsyncRedisSaver (for graph.ainvoke); caller must `await saver.asetup()` inside the event loop.
+    """
     if not use_checkpointer:
         return None
     if config.redis_url:
-        from langgraph.checkpoint.redis import RedisSaver
         ttl_config = None
         if config.checkpoint_ttl_minutes > 0:
             ttl_config = {
                 "default_ttl": config.checkpoint_ttl_minutes,
                 "refresh_on_read": True,
             }
-        saver = RedisSaver.from_conn_string(config.redis_url, ttl=ttl_config)
+        if async_mode:
+            from langgraph.checkpoint.redis.aio import AsyncRedisSaver
+            return AsyncRedisSaver(redis_url=config.redis_url, ttl=ttl_config)
+        from langgraph.checkpoint.redis import RedisSaver
+        saver = RedisSaver(redis_url=config.redis_url, ttl=ttl_config)
         saver.setup()
         return saver
-    return MemorySaver()
+    return LRUMemorySaver(max_threads=config.memory_checkpoint_max_threads)
 from .registry import AgentRegistry, InMemoryAgentRegistry
 from .router import SessionRouter
 from .agents.support import create_support_agent
 from .agents.billing import create_billing_agent
 from .shared_services.rag import StubRAGService
 from .shared_services.faithfulness import (
+    BatchingFaithfulnessScorer,
     FaithfulnessScorer,
     StubFaithfulnessScorer,
     TFFaithfulnessScorer,
 )
-from .agent_ops.circuit_breaker import CircuitBreaker
+from .agent_ops.circuit_breaker import CircuitBreaker, get_circuit_breaker
+from .hitl import EscalationContext, HitlHandler, get_hitl_handler
 
 
 class SupervisorState(TypedDict, total=False):
     """State schema for the supervisor graph."""
     messages: Annotated[list[BaseMessage], add_messages]
     current_agent: str | None
+    candidate_agent_ids: list[str]  # Available suggested agents, in order (fanned out when PARALLEL_AGENTS)
     session_id: str
     user_id: str
     suggested_agent_ids: list[str]
@@ -53,7 +137,109 @@ class SupervisorState(TypedDict, total=False):
     escalation_reason: str
     resolved: bool
     last_rag_context: str
+    last_ai_response: str  # This turn's agent reply text, set by invoke_agent (aggregate reads it without a scan)
     faithfulness_score: float | None  # Set in aggregate_node for observability (e.g. Langfuse)
+    draft_faithfulness: float | None  # Score of this turn's reply from parallel candidate selection (aggregate reuses it)
+
+
+# Escalation reply text. The AIMessage itself is built per escalation: add_messages assigns a missing id in place,
+# so one shared instance would carry the same id into every thread and a later escalation would replace the first.
+_ESCALATION_REPLY = "I'm connecting you with a human agent. Please hold."
+
+# invoke_agent update defaults (the keys every agent result is expected to carry)
+_EMPTY_AGENT_OUT: dict[str, Any] = {
+    "messages": [],
+    "resolved": False,
+    "needs_escalation": False,
+    "last_rag_context": "",
+    "draft_faithfulness": None,
+}
+
+
+# Agents per RAG service, shared across graph builds (tools, MCP tools and LLM clients are resolved at construction).
+# Holding the rag object keeps its id() from being reused while the entry exists.
+_AGENT_CACHE: "OrderedDict[int, tuple[Any, dict[str, Any]]]" = OrderedDict()
+_AGENT_CACHE_SIZE = 4
+_agent_cache_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def _default_rag() -> StubRAGService:
+    return StubRAGService()
+
+
+@functools.lru_cache(maxsize=2)
+def _default_scorer(use_tf: bool, model_path: str, use_tflite: bool, batching: bool) -> FaithfulnessScorer:
+    """Process-wide default scorer per config: the TF model is loaded once, not per graph build."""
+    if not use_tf:
+        return StubFaithfulnessScorer()
+    scorer = TFFaithfulnessScorer(model_path=model_path or None, use_tflite=use_tflite)
+    # Built at graph construction (process start for the API): pay model load + first trace here, not on a request
+    scorer.warmup()
+    if batching:
+        return BatchingFaithfulnessScorer(
+            scorer, batch_size=config.faithfulness_batch_size, max_wait_ms=config.faithfulness_batch_max_wait_ms
+        )
+    return scorer
+
+
+def _shared_agents(rag: Any) -> dict[str, Any]:
+    """{"support": ..., "billing": ...} built once per rag instance."""
+    with _agent_cache_lock:
+        hit = _AGENT_CACHE.get(id(rag))
+        if hit is not None and hit[0] is rag:
+            _AGENT_CACHE.move_to_end(id(rag))
+            return hit[1]
+        agents = {"support": create_support_agent(rag=rag), "billing": create_billing_agent(rag=rag)}
+        _AGENT_CACHE[id(rag)] = (rag, agents)
+        while len(_AGENT_CACHE) > _AGENT_CACHE_SIZE:
+            _AGENT_CACHE.popitem(last=False)
+        return agents
+
+
+def clear_agent_cache() -> None:
+    """Drop shared agents and default rag / scorer (e.g. after config or MCP tool changes); the next graph build recreates them."""
+    with _agent_cache_lock:
+        _AGENT_CACHE.clear()
+    _default_rag.cache_clear()
+    _default_scorer.cache_clear()
+
+
+def _last_of_type(messages: list, msg_type: str) -> BaseMessage | None:
+    """Most recent message of msg_type ("human" / "ai"). The tail is checked first: it is almost always the match."""
+    if messages and getattr(messages[-1], "type", None) == msg_type:
+        return messages[-1]
+    return next((m for m in reversed(messages) if getattr(m, "type", None) == msg_type), None)
+
+
+def _last_human_and_ai(messages: list) -> tuple[BaseMessage | None, BaseMessage | None]:
+    """(most recent human message, most recent AI message) in one backwards pass that stops once both are found."""
+    last_human = last_ai = None
+    for m in reversed(messages):
+        t = getattr(m, "type", None)
+        if t == "human" and last_human is None:
+            last_human = m
+        elif t == "ai" and last_ai is None:
+            last_ai = m
+        if last_human is not None and last_ai is not None:
+            break
+    return last_human, last_ai
+
+
+def _reply_text(messages: list) -> str:
+    """Text of the last AI message in messages ("" if none)."""
+    last_ai = _last_of_type(messages or [], "ai")
+    return str(getattr(last_ai, "content", None) or "")
+
+
+def _agent_update(state: dict[str, Any], result: dict[str, Any], **extra: Any) -> dict[str, Any]:
+    """
+    invoke_agent state update: defaults, the agent's result, and its reply text for aggregate.
+    Sparse: keys already holding the same value in state are left out (no channel write / checkpoint blob for them).
+    """
+    out = {**_EMPTY_AGENT_OUT, **result, **extra}
+    out["last_ai_response"] = _reply_text(out["messages"])
+    return {k: v for k, v in out.items() if k == "messages" or k not in state or state[k] != v}
 
 
 def create_supervisor_graph(
@@ -62,6 +248,7 @@ def create_supervisor_graph(
     rag=None,
     faithfulness_scorer: FaithfulnessScorer | None = None,
     circuit_breaker: Optional[CircuitBreaker] = None,
+    hitl_handler: Optional[HitlHandler] = None,
 ) -> StateGraph:
     """Create the supervisor LangGraph graph with route, invoke_agent, aggregate, escalate.
     When circuit_breaker is provided and agent_ops_enabled, route skips open circuits and
@@ -70,46 +257,53 @@ def create_supervisor_graph(
 
     router = router or SessionRouter()
     registry = registry or InMemoryAgentRegistry()
-    rag = rag or StubRAGService()
-    scorer = faithfulness_scorer or (
-        TFFaithfulnessScorer(model_path=config.tf_faithfulness_model_path or None)
-        if config.use_tf_faithfulness
-        else StubFaithfulnessScorer()
+    rag = rag or _default_rag()
+    scorer = faithfulness_scorer or _default_scorer(
+        config.use_tf_faithfulness,
+        config.tf_faithfulness_model_path,
+        config.tf_faithfulness_tflite,
+        config.faithfulness_batching_enabled,
     )
     use_ops = config.agent_ops_enabled and circuit_breaker is not None
+    max_response_chars = config.faithfulness_max_response_chars
+    max_context_chars = config.faithfulness_max_context_chars
+    min_response_chars = config.faithfulness_min_response_chars
     fallback_id = config.failover_fallback_agent_id
 
-    support_agent = create_support_agent(rag=rag)
-    billing_agent = create_billing_agent(rag=rag)
-    agents_map = {"support": support_agent, "billing": billing_agent}
+    agents_map = _shared_agents(rag)
+    support_agent = agents_map["support"]
     use_planning = getattr(config, "use_planning", False)
-    backend = get_llm_backend()
+    parallel_agents = config.parallel_agents
+    # Planner LLM resolved once per graph, not per turn (it shares the process-wide client either way)
+    planner_llm = (
+        get_llm_backend().create_text_llm(model=config.default_model, temperature=0, top_p=config.top_p)
+        if use_planning
+        else None
+    )
+    # agents_map is fixed per graph: candidate list and planner system prompt are built once
+    planner_choices = [a for a in ["support", "billing"] if a in agents_map]
+    planner_system_msg = SystemMessage(content="You are a router. Reply with only one word: support or billing.")
 
     def plan_node(state: dict[str, Any]) -> dict[str, Any]:
         """When USE_PLANNING: use LLM to pick which agent(s) should handle this turn; otherwise no-op."""
         if not use_planning:
             return {}
         messages = state.get("messages", [])
-        last_human = next((m for m in reversed(messages) if isinstance(m, HumanMessage)), None)
+        last_human = _last_of_type(messages, "human")
         suggested = state.get("suggested_agent_ids", ["support"])
         if not last_human or not getattr(last_human, "content", None):
             return {"planned_agent_ids": list(suggested)[:1] or ["support"]}
         user_text = str(last_human.content).strip()[:500]
-        available = [a for a in ["support", "billing"] if a in agents_map]
+        available = planner_choices
         prompt = (
             f"User message: {user_text}\n"
             f"Suggested agents from router: {suggested}\n"
             f"Available agents: {available}. Which single agent should handle this? Reply with exactly one word: support or billing."
         )
-        llm = backend.create_text_llm(
-            model=config.default_model,
-            temperature=0,
-            top_p=config.top_p,
-        )
         try:
-            resp = llm.invoke([SystemMessage(content="You are a router. Reply with only one word: support or billing."), HumanMessage(content=prompt)])
+            resp = planner_llm.invoke([planner_system_msg, HumanMessage(content=prompt)])
             text = (getattr(resp, "content", None) or "").strip().lower()
-            match = re.search(r"\b(support|billing)\b", text)
+            match = _PLANNER_CHOICE_RE.search(text)
             chosen = match.group(1) if match and match.group(1) in agents_map else (available[0] if available else "support")
             return {"planned_agent_ids": [chosen]}
         except Exception:
@@ -119,73 +313,163 @@ def create_supervisor_graph(
         """Use planned_agent_ids (if planning) or router suggestions; skip agents with open circuit when AgentOps enabled."""
         planned = state.get("planned_agent_ids") or []
         suggested = list(planned) if planned else list(state.get("suggested_agent_ids", ["support"]))
-        for aid in suggested:
-            if aid not in agents_map:
-                continue
-            if use_ops and not circuit_breaker.is_available(aid):
-                continue
-            return {"current_agent": aid}
+        candidates = [
+            aid for aid in dict.fromkeys(suggested)
+            if aid in agents_map and not (use_ops and not circuit_breaker.is_available(aid))
+        ]
+        if candidates:
+            return {"current_agent": candidates[0], "candidate_agent_ids": candidates}
         # No available suggested agent: pick first existing (may be circuit-open; invoke_agent will failover)
         for aid in suggested:
             if aid in agents_map:
-                return {"current_agent": aid}
-        return {"current_agent": "support"}
+                return {"current_agent": aid, "candidate_agent_ids": []}
+        return {"current_agent": "support", "candidate_agent_ids": []}
 
-    def invoke_agent_node(state: dict[str, Any]) -> dict[str, Any]:
-        """Invoke the chosen agent; on failure record and optionally failover to fallback agent."""
-        agent_id = state.get("current_agent", "support")
+    def _agent_result(state: dict[str, Any], result: dict[str, Any], aid: str, **extra: Any) -> dict[str, Any]:
+        if use_ops:
+            circuit_breaker.record_success(aid)
+        # Agents return exactly these keys; the defaults only fill in what a result leaves out
+        return _agent_update(state, result, **extra)
+
+    def _agent_failed(state: dict[str, Any]) -> dict[str, Any]:
+        # All failed: return friendly message and escalate
+        return _agent_update(
+            state,
+            {
+                "messages": [
+                    AIMessage(
+                        content="I'm sorry, I'm having trouble right now. Please try again in a moment or contact support directly."
+                    )
+                ],
+                "needs_escalation": True,
+            }
+        )
+
+    def _pick_agents(agent_id: str) -> tuple[str, Any, Any]:
         agent = agents_map.get(agent_id, support_agent)
         fallback_agent = agents_map.get(fallback_id, support_agent) if fallback_id != agent_id else None
+        return agent_id, agent, fallback_agent
 
-        def run_agent(agt: Any, aid: str) -> dict[str, Any]:
-            result = agt(state)
+    def invoke_agent_node(state: dict[str, Any]) -> dict[str, Any]:
+        """Invoke the chosen agent; on failure record and optionally failover to fallback agent."""
+        agent_id, agent, fallback_agent = _pick_agents(state.get("current_agent", "support"))
+        try:
+            return _agent_result(state, agent(state), agent_id)
+        except Exception:
             if use_ops:
-                circuit_breaker.record_success(aid)
-            return {
-                "messages": result.get("messages", []),
-                "resolved": result.get("resolved", False),
-                "needs_escalation": result.get("needs_escalation", False),
-                "last_rag_context": result.get("last_rag_context", ""),
-            }
+                circuit_breaker.record_failure(agent_id)
+            if config.failover_enabled and fallback_agent is not None and use_ops:
+                try:
+                    return _agent_result(state, fallback_agent(state), fallback_id)
+                except Exception:
+                    if use_ops:
+                        circuit_breaker.record_failure(fallback_id)
+            return _agent_failed(state)
+
+    async def ainvoke_agent_node(state: dict[str, Any]) -> dict[str, Any]:
+        """Async invoke_agent (used by graph.ainvoke): agents run their tool calls concurrently."""
+        candidates = state.get("candidate_agent_ids") or []
+        if parallel_agents and len(candidates) > 1:
+            return await _ainvoke_parallel(state, candidates)
+        return await _ainvoke_with_failover(state, state.get("current_agent", "support"))
 
+    async def _ainvoke_with_failover(state: dict[str, Any], agent_id: str, **extra: Any) -> dict[str, Any]:
+        agent_id, agent, fallback_agent = _pick_agents(agent_id)
         try:
-            return run_agent(agent, agent_id)
+            return _agent_result(state, await agent.ainvoke(state), agent_id, **extra)
         except Exception:
             if use_ops:
                 circuit_breaker.record_failure(agent_id)
             if config.failover_enabled and fallback_agent is not None and use_ops:
                 try:
-                    return run_agent(fallback_agent, fallback_id)
+                    return _agent_result(state, await fallback_agent.ainvoke(state), fallback_id)
                 except Exception:
                     if use_ops:
                         circuit_breaker.record_failure(fallback_id)
-            # All failed: return friendly message and escalate
-            return {
-                "messages": [
-                    AIMessage(
-                        content="I'm sorry, I'm having trouble right now. Please try again in a moment or contact support directly."
-                    )
-                ],
-                "resolved": False,
-                "needs_escalation": True,
-                "last_rag_context": "",
-            }
+            return _agent_failed(state)
 
-    def aggregate_node(state: dict[str, Any]) -> dict[str, Any]:
-        """Merge agent response into state. Run faithfulness scorer; if score < threshold, escalate."""
-        out: dict[str, Any] = {}
-        messages = state.get("messages", [])
-        last_ai = next((m for m in reversed(messages) if hasattr(m, "type") and m.type == "ai"), None)
-        response_text = getattr(last_ai, "content", None) or ""
+    async def _ainvoke_parallel(state: dict[str, Any], candidates: list[str]) -> dict[str, Any]:
+        """
+        Multi-intent turn: every candidate drafts a tool-free reply at once (no tool side effects, no cache writes);
+        the draft with the best faithfulness score against its own RAG context picks the agent, which then answers
+        as usual (tools, failover) and becomes current_agent. Its draft score is reused if the reply is unchanged.
+        """
+        drafts = await asyncio.gather(*(agents_map[aid].adraft(state) for aid in candidates), return_exceptions=True)
+        ok: list[tuple[str, dict[str, Any]]] = []
+        for aid, draft in zip(candidates, drafts):
+            if isinstance(draft, BaseException):
+                if use_ops:
+                    circuit_breaker.record_failure(aid)
+            else:
+                ok.append((aid, draft))
+        if not ok:
+            # No usable draft: the sequential path, with its failover to the fallback agent
+            return await _ainvoke_with_failover(state, state.get("current_agent", "support"))
+        if len(ok) == 1:
+            return await _ainvoke_with_failover(state, ok[0][0], current_agent=ok[0][0])
+        pairs = []
+        for _, draft in ok:
+            reply = _reply_text(draft.get("messages"))
+            pairs.append((reply[: max_response_chars or None], (draft.get("last_rag_context") or "")[: max_context_chars or None]))
+        scores = await scorer.ascore_batch(pairs)
+        best = max(range(len(ok)), key=scores.__getitem__)
+        aid = ok[best][0]
+        update = await _ainvoke_with_failover(state, aid, current_agent=aid)
+        if update.get("last_ai_response") == _reply_text(ok[best][1].get("messages")):
+            update["draft_faithfulness"] = scores[best]
+        return update
+
+    def _score_inputs(state: dict[str, Any]) -> tuple[str, str]:
+        response_text = state.get("last_ai_response")
+        if response_text is None:
+            # State from before last_ai_response existed (e.g. an older checkpoint)
+            response_text = _reply_text(state.get("messages", []))
         context = state.get("last_rag_context", "") or ""
-        if response_text and scorer:
-            faith = scorer.score(response_text, context)
-            out["faithfulness_score"] = faith
-            if faith < config.hallucination_threshold_faithfulness:
-                out["needs_escalation"] = True
-                out["escalation_reason"] = "low_faithfulness"
+        # Faithfulness is judged on a bounded prefix: scorer cost stays flat for long replies / large contexts
+        return response_text[: max_response_chars or None], context[: max_context_chars or None]
+
+    def _faithfulness_update(faith: float) -> dict[str, Any]:
+        out: dict[str, Any] = {"faithfulness_score": faith}
+        if faith < config.hallucination_threshold_faithfulness:
+            out["needs_escalation"] = True
+            out["escalation_reason"] = "low_faithfulness"
         return out
 
+    def _skip_scoring(state: dict[str, Any], response_text: str, context: str) -> dict[str, Any] | None:
+        """Cheap pre-checks that make the model call unnecessary; None = score it."""
+        reply = response_text.strip()
+        if reply and reply in context:
+            # Verbatim quote of the retrieved context: grounded by construction
+            return {"faithfulness_score": 1.0}
+        if len(reply) < min_response_chars:
+            # Not scored (reset so the previous turn's score isn't reported for this one)
+            return {"faithfulness_score": None}
+        draft_score = state.get("draft_faithfulness")
+        if draft_score is not None:
+            # Already scored during parallel candidate selection (same reply text)
+            return _faithfulness_update(draft_score)
+        return None
+
+    def aggregate_node(state: dict[str, Any]) -> dict[str, Any]:
+        """Merge agent response into state. Run faithfulness scorer; if score < threshold, escalate."""
+        response_text, context = _score_inputs(state)
+        if not (response_text and scorer):
+            return {}
+        skipped = _skip_scoring(state, response_text, context)
+        if skipped is not None:
+            return skipped
+        return _faithfulness_update(scorer.score(response_text, context))
+
+    async def aaggregate_node(state: dict[str, Any]) -> dict[str, Any]:
+        """Async aggregate (graph.ainvoke): model-backed scoring runs off the event loop (FaithfulnessScorer.ascore)."""
+        response_text, context = _score_inputs(state)
+        if not (response_text and scorer):
+            return {}
+        skipped = _skip_scoring(state, response_text, context)
+        if skipped is not None:
+            return skipped
+        return _faithfulness_update(await scorer.ascore(response_text, context))
+
     _hitl = hitl_handler if hitl_handler is not None else get_hitl_handler(
         handler_name=getattr(config, "hitl_handler", "stub"),
         enabled=getattr(config, "hitl_enabled", True),
@@ -195,8 +479,7 @@ def create_supervisor_graph(
     def escalate_node(state: dict[str, Any]) -> dict[str, Any]:
         """Handle escalation: call HITL (ticket/email) then return message to user."""
         messages = state.get("messages", [])
-        last_human = next((m for m in reversed(messages) if hasattr(m, "type") and m.type == "human"), None)
-        last_ai = next((m for m in reversed(messages) if hasattr(m, "type") and m.type == "ai"), None)
+        last_human, last_ai = _last_human_and_ai(messages)
         reason = state.get("escalation_reason") or "agent_requested"
         ctx = EscalationContext(
             session_id=state.get("session_id", ""),
@@ -210,19 +493,16 @@ def create_supervisor_graph(
             _hitl.on_escalate(ctx)
         except Exception:
             pass
-        return {
-            "messages": [
-                AIMessage(content="I'm connecting you with a human agent. Please hold.")
-            ],
-        }
+        return {"messages": [AIMessage(content=_ESCALATION_REPLY)]}
 
     # Build graph: plan (when USE_PLANNING) → route → invoke_agent → aggregate → (optional) escalate
     builder = StateGraph(SupervisorState)
 
     builder.add_node("plan", plan_node)
     builder.add_node("route", route_node)
-    builder.add_node("invoke_agent", invoke_agent_node)
-    builder.add_node("aggregate", aggregate_node)
+    # Sync and async implementations: graph.invoke uses the former, graph.ainvoke the latter
+    builder.add_node("invoke_agent", RunnableLambda(invoke_agent_node, afunc=ainvoke_agent_node, name="invoke_agent"))
+    builder.add_node("aggregate", RunnableLambda(aggregate_node, afunc=aaggregate_node, name="aggregate"))
     builder.add_node("escalate", escalate_node)
 
     builder.set_entry_point("plan")
@@ -246,7 +526,26 @@ def build_supervisor(
     registry: AgentRegistry | None = None,
     use_checkpointer: bool = True,
     circuit_breaker: Optional[CircuitBreaker] = None,
+    async_checkpointer: bool = False,
+    hitl_handler: Optional[HitlHandler] = None,
 ) -> Any:
-    """Build compiled supervisor graph. Uses Redis checkpointer if REDIS_URL is set, else in-memory (or none)."""
-    graph = create_supervisor_graph(router=router, registry=registry, circuit_breaker=circuit_breaker)
-    return graph.compile(checkpointer=_make_checkpointer(use_checkpointer))
+    """Build compiled supervisor graph. Uses Redis checkpointer if REDIS_URL is set, else in-memory (or none).
+    Set async_checkpointer=True when the graph is driven with ainvoke (e.g. from the FastAPI app).
+    """
+    graph = create_supervisor_graph(
+        router=router, registry=registry, circuit_breaker=circuit_breaker, hitl_handler=hitl_handler
+    )
+    return graph.compile(checkpointer=_make_checkpointer(use_checkpointer, async_mode=async_checkpointer))
+
+
+@functools.lru_cache(maxsize=2)
+def get_supervisor(async_checkpointer: bool = True) -> Any:
+    """Process-wide compiled supervisor (compiled once, even if the importing module is reloaded).
+    Uses the shared circuit breaker and HITL handler, so /health reports the same breaker the graph updates.
+    """
+    return build_supervisor(
+        use_checkpointer=True,
+        circuit_breaker=get_circuit_breaker(),
+        async_checkpointer=async_checkpointer,
+        hitl_handler=get_hitl_handler(config.hitl_handler, config.hitl_enabled, config.hitl_email_to),
+    )
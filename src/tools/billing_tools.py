@@ -1,31 +1,49 @@
 """Billing agent tools: invoice lookup, refund status, refund request."""
+import zlib
+
 from langchain_core.tools import tool
+from pydantic import BaseModel
+
+
+# Argument schemas written out: @tool skips building one from the signature at import
+class LookUpInvoiceArgs(BaseModel):
+    invoice_id: str
+
 
+class GetRefundStatusArgs(BaseModel):
+    refund_id: str
 
-@tool
+
+class CreateRefundRequestArgs(BaseModel):
+    order_id: str
+    reason: str
+    amount_cents: int | None = None
+
+
+@tool(args_schema=LookUpInvoiceArgs)
 def look_up_invoice(invoice_id: str) -> str:
     """Look up an invoice by ID. Use when the user asks about a specific invoice, payment status, or invoice details."""
     # Stub: production would call billing API
     return f"[Stub] Invoice {invoice_id}: status=paid, amount=$150.00, due_date=2025-01-15. Contact billing team for disputes."
 
 
-@tool
+@tool(args_schema=GetRefundStatusArgs)
 def get_refund_status(refund_id: str) -> str:
     """Get the status of a refund request. Use when the user asks about an existing refund."""
     # Stub: production would call billing API
     return f"[Stub] Refund {refund_id}: status=processing, expected 5-7 business days. Contact billing@example.com for details."
 
 
-@tool
+@tool(args_schema=CreateRefundRequestArgs)
 def create_refund_request(
     order_id: str,
     reason: str,
     amount_cents: int | None = None,
 ) -> str:
     """Create a refund request for an order. Use when the user wants to request a refund. Amount is optional (full refund if omitted)."""
-    # Stub: production would call billing API
+    # Stub: production would call billing API. crc32 ref: same for an order in every process (hash() is salted)
     amt = f"${amount_cents/100:.2f}" if amount_cents else "full"
-    return f"[Stub] Refund request created for order {order_id}, {amt} refund. Reason: {reason}. Ref: REF-{hash(order_id) % 100000}. Processing within 3-5 business days."
+    return f"[Stub] Refund request created for order {order_id}, {amt} refund. Reason: {reason}. Ref: REF-{zlib.crc32(order_id.encode()) % 100000}. Processing within 3-5 business days."
 
 
 def get_billing_tools() -> list:
@@ -1,40 +1,193 @@
 """MCP (Model Context Protocol) integration: load tools from MCP servers. Required. Uses langchain-mcp-adapters."""
 import asyncio
+import logging
 import os
+import threading
+import time
 from typing import Any
 
+import anyio
+from langchain_core.tools import ToolException
+
 try:
     from langchain_mcp_adapters.tools import load_mcp_tools
+    from mcp.shared.exceptions import McpError
     MCP_AVAILABLE = True
 except ImportError:
     MCP_AVAILABLE = False
 
+logger = logging.getLogger(__name__)
+
+# One long-lived MCP session per server URL, owned by a task on a dedicated event-loop thread. Loads and tool calls
+# from any thread or loop are forwarded there, so the initialize handshake is paid once per process, not per call.
+_MCP_LOAD_TIMEOUT = 30.0
+_mcp_loop: asyncio.AbstractEventLoop | None = None
+_mcp_loop_lock = threading.Lock()
+# url -> (owner task, stop event, future resolving to the ClientSession); only touched on _mcp_loop
+_mcp_sessions: dict[str, tuple[asyncio.Task, asyncio.Event, asyncio.Future]] = {}
+# url -> (session, adapter tools by name) from the last listing on that session
+_mcp_session_tools: dict[str, tuple[Any, dict[str, Any]]] = {}
+
+
+def _get_mcp_loop() -> asyncio.AbstractEventLoop:
+    global _mcp_loop
+    if _mcp_loop is None:
+        with _mcp_loop_lock:
+            if _mcp_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="mcp-session", daemon=True).start()
+                _mcp_loop = loop
+    return _mcp_loop
+
+
+def _run_on_mcp_loop(coro: Any, timeout: float | None = None) -> Any:
+    return asyncio.run_coroutine_threadsafe(coro, _get_mcp_loop()).result(timeout)
+
+
+async def _own_session(url: str, ready: asyncio.Future, stop: asyncio.Event) -> None:
+    # The transport's cancel scopes must be entered and exited by the same task, so this task holds the session open
+    from mcp import ClientSession
+    from mcp.client.streamable_http import streamablehttp_client
+
+    from ..shared_services.http import mcp_http_client_factory
+
+    try:
+        async with streamablehttp_client(url, httpx_client_factory=mcp_http_client_factory) as (read, write, _):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                ready.set_result(session)
+                await stop.wait()
+    except Exception as e:
+        if not ready.done():
+            ready.set_exception(e)
+
+
+async def _session(url: str) -> Any:
+    entry = _mcp_sessions.get(url)
+    if entry is None or entry[0].done():
+        loop = asyncio.get_running_loop()
+        ready, stop = loop.create_future(), asyncio.Event()
+        entry = _mcp_sessions[url] = (loop.create_task(_own_session(url, ready, stop)), stop, ready)
+    return await asyncio.shield(entry[2])
+
+
+async def _drop_session(url: str) -> None:
+    entry = _mcp_sessions.pop(url, None)
+    _mcp_session_tools.pop(url, None)
+    if entry is not None:
+        entry[1].set()
+        await asyncio.gather(entry[0], return_exceptions=True)
+
+
+async def _list_tools(url: str) -> dict[str, Any]:
+    session = await _session(url)
+    tools = {t.name: t for t in await load_mcp_tools(session)}
+    _mcp_session_tools[url] = (session, tools)
+    return tools
+
+
+async def _call_tool(url: str, name: str, kwargs: dict[str, Any]) -> Any:
+    for attempt in range(2):
+        session = await _session(url)
+        hit = _mcp_session_tools.get(url)
+        tools = hit[1] if hit is not None and hit[0] is session else await _list_tools(url)
+        tool = tools.get(name)
+        if tool is None:
+            raise ToolException(f"MCP tool {name!r} is no longer available on {url}")
+        try:
+            return await tool.coroutine(**kwargs)
+        except (anyio.ClosedResourceError, anyio.BrokenResourceError, McpError) as e:
+            # Connection dropped, or the server restarted and no longer knows the session: reconnect once
+            if attempt or (isinstance(e, McpError) and e.error.message != "Session terminated"):
+                raise
+            await _drop_session(url)
+
+
+def _proxy_tool(url: str, tool: Any) -> Any:
+    """Copy of an adapter tool whose calls (sync or async, from any loop) run on the shared session."""
+    name = tool.name
+
+    async def acall(**kwargs: Any) -> Any:
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(_call_tool(url, name, kwargs), _get_mcp_loop()))
+
+    def call(**kwargs: Any) -> Any:
+        return _run_on_mcp_loop(_call_tool(url, name, kwargs))
+
+    return tool.model_copy(update={"coroutine": acall, "func": call})
+
 
 def load_mcp_tools_sync(server_url: str | None = None) -> list[Any]:
     """
-    Load tools from an MCP server. Required. Set MCP_SERVER_URL env var (e.g. http://localhost:3000/mcp).
-    Raises if MCP is not configured or fails to load.
+    Load tools from MCP servers. Required. Set MCP_SERVER_URL env var (e.g. http://localhost:3000/mcp); a
+    comma-separated list loads every server concurrently. Tools are listed on the process-wide session for
+    each URL (opened on first use) and call through it.
+    Raises if MCP is not configured or no server loads; with several servers, failed ones are logged and skipped.
     """
     if not MCP_AVAILABLE:
         raise RuntimeError("MCP is required. Install: pip install langchain-mcp-adapters")
 
-    url = server_url or os.getenv("MCP_SERVER_URL", "").strip()
-    if not url:
+    raw = server_url or os.getenv("MCP_SERVER_URL", "")
+    urls = [u.strip() for u in raw.split(",") if u.strip()]
+    if not urls:
         raise ValueError("MCP_SERVER_URL is required. Set it in .env (e.g. MCP_SERVER_URL=http://localhost:3000/mcp)")
 
-    async def _load() -> list[Any]:
-        from mcp import ClientSession
-        from mcp.client.streamable_http import streamablehttp_client
-
-        async with streamablehttp_client(url) as (read, write, _):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
-                return await load_mcp_tools(session)
+    async def _list_all() -> list:
+        # Handshakes overlap: N servers cost the slowest one, not the sum
+        return await asyncio.gather(*(_list_tools(u) for u in urls), return_exceptions=True)
 
     try:
-        return asyncio.run(_load())
+        results = _run_on_mcp_loop(_list_all(), timeout=_MCP_LOAD_TIMEOUT)
     except Exception as e:
-        raise RuntimeError(f"MCP failed to load tools from {url}: {e}") from e
+        raise RuntimeError(f"MCP failed to load tools from {raw}: {e}") from e
+    tools: list[Any] = []
+    errors: list[str] = []
+    for url, result in zip(urls, results):
+        if isinstance(result, BaseException):
+            errors.append(f"{url}: {result}")
+        else:
+            tools.extend(_proxy_tool(url, t) for t in result.values())
+    if len(errors) == len(urls):
+        raise RuntimeError(f"MCP failed to load tools from {'; '.join(errors)}")
+    for err in errors:
+        logger.warning("MCP failed to load tools from %s", err)
+    return tools
+
+
+# MCP tool lists keyed by server URL: url -> (loaded_at monotonic, tools)
+_mcp_tools_cache: dict[str, tuple[float, list[Any]]] = {}
+_mcp_tools_lock = threading.Lock()
+
+
+def _get_mcp_tools_cached() -> list[Any]:
+    """
+    Load MCP tools, reusing the last list for MCP_TOOLS_TTL seconds (default 300; 0 = never expire).
+    Every agent construction needs the list; listing over streamable-http costs a round-trip each time.
+    Disable with MCP_CACHE_TOOLS=false.
+    """
+    if os.getenv("MCP_CACHE_TOOLS", "true").lower() not in ("true", "1", "yes"):
+        return load_mcp_tools_sync()
+    url = os.getenv("MCP_SERVER_URL", "").strip()
+    ttl = float(os.getenv("MCP_TOOLS_TTL", "300"))
+    with _mcp_tools_lock:
+        hit = _mcp_tools_cache.get(url)
+        if hit is not None and (ttl <= 0 or time.monotonic() - hit[0] < ttl):
+            return hit[1]
+        tools = load_mcp_tools_sync(url or None)
+        _mcp_tools_cache[url] = (time.monotonic(), tools)
+        return tools
+
+
+def refresh_mcp_tools() -> None:
+    """Drop cached MCP tool lists and close the shared sessions; the next load or tool call reconnects and relists."""
+    with _mcp_tools_lock:
+        _mcp_tools_cache.clear()
+    if _mcp_loop is not None:
+
+        async def _close_all() -> None:
+            for url in list(_mcp_sessions):
+                await _drop_session(url)
+
+        _run_on_mcp_loop(_close_all(), timeout=_MCP_LOAD_TIMEOUT)
 
 
 def get_tools_with_mcp(built_in_tools: list[Any]) -> list[Any]:
@@ -42,6 +195,6 @@ def get_tools_with_mcp(built_in_tools: list[Any]) -> list[Any]:
     Return built-in tools merged with MCP tools. MCP tools are loaded from MCP_SERVER_URL (required).
     """
     tools = list(built_in_tools)
-    mcp_tools = load_mcp_tools_sync()
+    mcp_tools = _get_mcp_tools_cached()
     tools.extend(mcp_tools)
     return tools
@@ -1,23 +1,37 @@
 """Support agent tools: knowledge base search, create ticket."""
+import zlib
+
 from langchain_core.tools import tool
+from pydantic import BaseModel
+
+
+# Argument schemas written out: @tool skips building one from the signature at import
+class SearchKnowledgeBaseArgs(BaseModel):
+    query: str
+
+
+class CreateSupportTicketArgs(BaseModel):
+    subject: str
+    description: str
+    priority: str = "normal"
 
 
-@tool
+@tool(args_schema=SearchKnowledgeBaseArgs)
 def search_knowledge_base(query: str) -> str:
     """Search the support knowledge base for FAQs and help articles. Use when the user asks about products, policies, or how-to questions."""
     # Stub: production would call real KB / Weaviate
     return f"[Stub KB] Found 2 articles for '{query}': (1) Getting started guide, (2) Common troubleshooting. Suggest checking the docs or escalating if needed."
 
 
-@tool
+@tool(args_schema=CreateSupportTicketArgs)
 def create_support_ticket(
     subject: str,
     description: str,
     priority: str = "normal",
 ) -> str:
     """Create a support ticket for human follow-up. Use when the user needs escalation or the issue cannot be resolved by the bot."""
-    # Stub: production would call ticketing API
-    return f"[Stub] Ticket created: subject='{subject}', priority={priority}. Ref: TKT-{hash(description) % 100000}. A human agent will follow up within 24 hours."
+    # Stub: production would call ticketing API. crc32 ref: same for a description in every process (hash() is salted)
+    return f"[Stub] Ticket created: subject='{subject}', priority={priority}. Ref: TKT-{zlib.crc32(description.encode()) % 100000}. A human agent will follow up within 24 hours."
 
 
 def get_support_tools() -> list: